@@ -0,0 +1,138 @@
+"""Compare turning on many lights at once with and without the command queue.
+
+The gateway connection is simulated. A write which waits for the gateway
+to acknowledge it takes two connection intervals, while writes without
+acknowledgement are sent a few per connection interval. The time from the
+commands being issued until the first light receives a command, and until
+the last light has received its final command, is reported.
+
+usage: python benchmarks/command_queue.py [light counts...]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from common import async_create_hass
+
+from pyplejd.ble import PlejdMesh
+from pyplejd.ble.crypto import encrypt_decrypt
+from pyplejd.interface.plejd_light import PlejdLight
+
+from plejd.plejd_commands import PlejdCommandQueue
+from plejd.plejd_scheduler import PlejdMeshScheduler
+
+DEFAULT_COUNTS = [5, 25, 100]
+REPEAT = 3
+
+CRYPTO_KEY = "00112233-4455-6677-8899-aabbccddeeff"
+GATEWAY_ADDRESS = "AABBCCDDEEFF"
+
+CONNECTION_INTERVAL = 0.015
+ACKNOWLEDGED_WRITE = 2 * CONNECTION_INTERVAL
+UNACKNOWLEDGED_WRITE = CONNECTION_INTERVAL / 4
+
+
+class SimulatedGateway:
+    """Stand-in for the gateway node of the mesh."""
+
+    BLEaddress = GATEWAY_ADDRESS
+
+
+class SimulatedCharacteristic:
+    properties = ["write", "write-without-response"]
+
+
+class SimulatedServices:
+    def get_characteristic(self, uuid):
+        return SimulatedCharacteristic()
+
+
+class SimulatedClient:
+    """GATT client which records when each light receives commands."""
+
+    def __init__(self):
+        self.services = SimulatedServices()
+        self.first_received: dict[int, float] = {}
+        self.received: dict[int, float] = {}
+        self.writes = 0
+
+    async def write_gatt_char(self, characteristic, data, response=True):
+        await asyncio.sleep(ACKNOWLEDGED_WRITE if response else UNACKNOWLEDGED_WRITE)
+        self.writes += 1
+        address = encrypt_decrypt(CRYPTO_KEY, GATEWAY_ADDRESS, data)[0]
+        self.received[address] = time.perf_counter()
+        self.first_received.setdefault(address, self.received[address])
+
+
+class BenchmarkLight:
+    """Light which encodes its commands like a pyplejd light."""
+
+    turn_on = PlejdLight.turn_on
+    turn_off = PlejdLight.turn_off
+
+    def __init__(self, address: int, mesh: PlejdMesh):
+        self.address = address
+        self._mesh = mesh
+
+
+async def turn_on_lights(count: int, queued: bool, repeats: int) -> dict:
+    """Turn on count lights, repeating the command for each, and time it."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+
+        mesh = PlejdMesh(None)
+        mesh.set_key(CRYPTO_KEY)
+        mesh._gateway_node = SimulatedGateway()
+        mesh._client = client = SimulatedClient()
+
+        manager = type("Manager", (), {"mesh": mesh})()
+        queue = PlejdCommandQueue(hass, manager, PlejdMeshScheduler())
+        lights = [BenchmarkLight(address, mesh) for address in range(1, count + 1)]
+
+        # Repeated commands are what e.g. dragging a brightness slider sends
+        commands = [
+            queue.send(light, "turn_on", dim=dim) if queued else light.turn_on(dim)
+            for dim in range(255 - repeats + 1, 256)
+            for light in lights
+        ]
+
+        start = time.perf_counter()
+        await asyncio.gather(*commands)
+        await hass.async_stop(force=True)
+
+        assert len(client.received) == count
+        return {
+            "first": min(client.first_received.values()) - start,
+            "last": max(client.received.values()) - start,
+            "writes": client.writes,
+        }
+
+
+async def run(counts: list[int]):
+    print(
+        f"{'lights':>6} {'repeats':>7} {'mode':>8} "
+        f"{'first on':>10} {'last on':>10} {'writes':>7}"
+    )
+    for count in counts:
+        for repeats in (1, 3):
+            for queued in (False, True):
+                best = None
+                for _ in range(REPEAT):
+                    result = await turn_on_lights(count, queued, repeats)
+                    if best is None or result["last"] < best["last"]:
+                        best = result
+                print(
+                    f"{count:>6} {repeats:>7} {'queue' if queued else 'direct':>8} "
+                    f"{best['first']*1000:>8.1f}ms {best['last']*1000:>8.1f}ms "
+                    f"{best['writes']:>7}"
+                )
+
+
+def main(counts: list[int]):
+    asyncio.run(run(counts))
+
+
+if __name__ == "__main__":
+    main([int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS)
@@ -0,0 +1,98 @@
+"""Shared helpers for the Plejd benchmarks.
+
+The benchmarks run against a real Home Assistant core, so they need
+Home Assistant and pyplejd to be importable (e.g. from the devcontainer).
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), os.pardir, "custom_components")
+)
+
+from homeassistant import config_entries, loader
+from homeassistant.core import CoreState, HomeAssistant
+from homeassistant.helpers import (
+    area_registry as ar,
+    device_registry as dr,
+    entity,
+    entity_registry as er,
+    restore_state,
+    translation,
+)
+
+from plejd.const import DOMAIN
+
+
+async def async_create_hass(config_dir: str) -> HomeAssistant:
+    """Create a minimal Home Assistant instance with loaded registries."""
+    hass = HomeAssistant(config_dir)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    loader.async_setup(hass)
+    translation.async_setup(hass)
+    entity.async_setup(hass)
+    await ar.async_load(hass)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+    await restore_state.async_load(hass)
+    hass.set_state(CoreState.running)
+    return hass
+
+
+def add_config_entry(hass: HomeAssistant, data=None) -> config_entries.ConfigEntry:
+    """Add a Plejd config entry without setting it up."""
+    entry = config_entries.ConfigEntry(
+        version=1,
+        minor_version=1,
+        domain=DOMAIN,
+        title="Benchmark",
+        data=data or {},
+        source=config_entries.SOURCE_USER,
+    )
+    hass.config_entries._entries[entry.entry_id] = entry
+    return entry
+
+
+class SyntheticDevice:
+    """Minimal stand-in for a pyplejd output device."""
+
+    def __init__(self, index: int, outputType: str = "LIGHT"):
+        self.address = index
+        self.rxAddress = -1
+        self.outputType = outputType
+        self.identifier = (f"{index:012X}", "O", "0")
+        self.device_identifier = f"{index:012X}:device{index}"
+        self.parent_identifier = self.device_identifier
+        self.ble_mac = ":".join(f"{index:012X}"[i : i + 2] for i in range(0, 12, 2))
+        self.BLEaddress = f"{index:012X}"
+        self.name = f"Device {index}"
+        self.room = f"Room {index % 20}"
+        self.hardware = "DIM-01"
+        self.firmware = "4.0.0"
+        self.hidden = False
+        self.dimmable = True
+        self.colortemp = None
+        self.is_primary = True
+        self.hw = None
+        self._listeners = set()
+
+    def subscribe(self, listener):
+        self._listeners.add(listener)
+        return lambda: self._listeners.discard(listener)
+
+    def update(self, state: dict):
+        for listener in self._listeners:
+            listener(state)
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    """Add the time spent in the context to results[name]."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[name] = results.get(name, 0) + time.perf_counter() - start
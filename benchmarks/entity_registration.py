@@ -0,0 +1,79 @@
+"""Compare adding entities one by one with adding them in one batch.
+
+The best of a few runs is reported for each device count.
+
+usage: python benchmarks/entity_registration.py [device counts...]
+"""
+
+import asyncio
+import logging
+import sys
+import tempfile
+from datetime import timedelta
+
+from common import async_create_hass, add_config_entry, SyntheticDevice, timer
+
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+from plejd.light import PlejdLight
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_COUNTS = [50, 200, 1000]
+REPEAT = 5
+
+
+async def add_entities(count: int, batched: bool) -> float:
+    """Add lights for count synthetic devices and return the time it took."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        platform = EntityPlatform(
+            hass=hass,
+            logger=_LOGGER,
+            domain="light",
+            platform_name="plejd",
+            platform=None,
+            scan_interval=timedelta(seconds=30),
+            entity_namespace=None,
+        )
+        platform.config_entry = add_config_entry(hass)
+
+        entities = [PlejdLight(SyntheticDevice(i)) for i in range(count)]
+
+        results = {}
+        with timer(results, "add"):
+            if batched:
+                await platform.async_add_entities(entities)
+            else:
+                await asyncio.gather(
+                    *(
+                        hass.async_create_task(platform.async_add_entities([entity]))
+                        for entity in entities
+                    )
+                )
+            await hass.async_block_till_done()
+
+        assert len(hass.states.async_entity_ids("light")) == count
+        await hass.async_stop(force=True)
+        return results["add"]
+
+
+async def run(counts: list[int]):
+    print(f"{'devices':>8} {'one by one':>12} {'batched':>12} {'speedup':>8}")
+    for count in counts:
+        single = batched = float("inf")
+        for _ in range(REPEAT):
+            single = min(single, await add_entities(count, batched=False))
+            batched = min(batched, await add_entities(count, batched=True))
+        print(
+            f"{count:>8} {single*1000:>10.1f}ms {batched*1000:>10.1f}ms "
+            f"{single/batched:>7.1f}x"
+        )
+
+
+def main(counts: list[int]):
+    asyncio.run(run(counts))
+
+
+if __name__ == "__main__":
+    main([int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS)
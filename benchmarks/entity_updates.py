@@ -0,0 +1,415 @@
+"""Measure the throughput of state updates through the Plejd entities.
+
+The integration is set up against the simulated mesh (see mesh_simulator.py)
+for a synthetic site, and synthetic updates are pushed through it:
+
+  micro  for each entity class, one entity gets a stream of state updates
+         through the device subscription, the way pyplejd delivers them.
+         Diagnostic entities get theirs through the hardware of the device.
+         Classes with no entity in the synthetic site are reported as
+         skipped.
+  macro  notifications are sent from the gateway and go all the way
+         through pyplejd (decryption, parsing and finding the device) to
+         the entities: lastdata for single outputs, lightlevel for polls.
+
+The updates alternate between a few states, so that every update leads to
+a state write unless the entity drops it on purpose, and the state write
+window is set to 0 so the writes aren't merged. Updates per second
+are reported, with the state writes per update, and - from a separate,
+shorter run under tracemalloc - the memory allocated during an update
+(the peak above what was in use before it) and retained after it.
+
+usage: python benchmarks/entity_updates.py [--devices N] [--updates N]
+                                           [--output FILE]
+"""
+
+import argparse
+import asyncio
+from datetime import timedelta
+import gc
+import logging
+import random
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from mesh_simulator import (
+    MeshSimulation,
+    SimulationConfig,
+    async_create_hass,
+    async_setup_simulated_entry,
+    simulate,
+)
+from results import write_results
+from synthetic_site import generate_site
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+from homeassistant.helpers.entity_platform import DATA_ENTITY_PLATFORM
+from homeassistant.util import dt as dt_util
+
+from pyplejd import DeviceTypes as dt
+from pyplejd.ble import LastData
+from pyplejd.ble import ble_characteristics as gatt
+
+from custom_components.plejd import plejd_gesture
+from custom_components.plejd.plejd_entity import PlejdDeviceDiagnosticEntity
+
+DEFAULT_DEVICES = 200
+DEFAULT_UPDATES = 100_000
+# Updates traced for the allocations, which is a lot slower
+TRACED_UPDATES = 2_000
+# Updates between yields to the event loop, so timers can run
+CHUNK = 1_000
+# Number of different states each entity cycles through
+STATES = 256
+
+# The entities updated from the mesh, by class
+ENTITY_CLASSES = [
+    "PlejdLight",
+    "PlejdSwitch",
+    "PlejdCover",
+    "PlejdClimate",
+    "PlejdMotionSensor",
+    "PlejdButtonEvent",
+    # Diagnostic entities
+    "PlejdLastSeenSensor",
+    "PlejdRSSISensor",
+    "PlejdGatewaySensor",
+    "PlejdConnectableSensor",
+]
+
+# No mesh traffic but what the benchmark sends
+QUIET = SimulationConfig(
+    state_rate=0,
+    button_rate=0,
+    scene_rate=0,
+    motion_rate=0,
+    advertisement_interval=0,
+    latency_min=0,
+    latency_max=0,
+)
+
+
+class SteppingClock:
+    """Clock which moves a step forward every time it is read.
+
+    Lets the gesture engine see presses far enough apart that none of them
+    are dropped as duplicates or as part of a storm.
+    """
+
+    def __init__(self, step: float):
+        self.now = time.monotonic()
+        self.step = step
+
+    def monotonic(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+def _output_states(entity) -> list[dict]:
+    """Return the states pyplejd could report for the device of an entity."""
+    available = {"available": True}
+    match type(entity).__name__:
+        case "PlejdLight":
+            return [{**available, "state": i % 8 != 0, "dim": i} for i in range(STATES)]
+        case "PlejdSwitch":
+            return [{**available, "state": i % 2 == 0} for i in range(STATES)]
+        case "PlejdCover":
+            return [
+                {**available, "moving": False, "opening": False, "position": i % 101}
+                for i in range(STATES)
+            ]
+        case "PlejdClimate":
+            return [
+                {
+                    **available,
+                    "mode": dt.PlejdThermostat.MODE_NORMAL,
+                    "target": 21,
+                    "current": 15 + i % 10,
+                    "heating": i % 10 < 6,
+                }
+                for i in range(STATES)
+            ]
+        case "PlejdMotionSensor":
+            return [
+                {**available, "motion": i % 2 == 0, "battery": 100, "bright": i % 4 < 2}
+                for i in range(STATES)
+            ]
+        case "PlejdButtonEvent":
+            button = entity.device.button_id
+            return [
+                {**available, "button": button, "action": ("press", "release")[i % 2]}
+                for i in range(STATES)
+            ]
+    raise ValueError(f"No states for {type(entity).__name__}")
+
+
+def _hardware_updates(entity, site) -> list:
+    """Return functions which change the hardware of the device of an entity."""
+    hw = entity.device.hw
+    resolution = site.last_seen_resolution.total_seconds()
+    start = dt_util.now().timestamp()
+
+    def seen(i):
+        def update():
+            hw.last_seen = dt_util.utc_from_timestamp(start + i * resolution)
+            site.gateway_ranking.add(hw.BLEaddress, "benchmark", -90 + i % 40)
+
+        return update
+
+    return [seen(i) for i in range(STATES)]
+
+
+def _isolate(entity):
+    """Let entity be the only subscriber of its device, and return the source.
+
+    Returns the device (or its hardware) and a function which restores the
+    other subscribers.
+    """
+    diagnostic = isinstance(entity, PlejdDeviceDiagnosticEntity)
+    source = entity.device.hw if diagnostic else entity.device
+    entity.listener()
+    subscribers, source._listeners = source._listeners, set()
+    entity.listener = entity._subscribe()
+
+    def restore():
+        entity.listener()
+        source._listeners = subscribers
+        entity.listener = entity._subscribe()
+
+    return source, restore
+
+
+def _drive(entity, site):
+    """Return a function which sends updates to entity, and one to restore it."""
+    source, restore = _isolate(entity)
+    if source is entity.device:
+        states = _output_states(entity)
+        listeners = source._listeners
+
+        def send(first: int, count: int) -> None:
+            for i in range(first, first + count):
+                for listener in listeners:
+                    listener(states[i % STATES])
+
+    else:
+        updates = _hardware_updates(entity, site)
+
+        def send(first: int, count: int) -> None:
+            for i in range(first, first + count):
+                updates[i % STATES]()
+                source.update()
+
+    return send, restore
+
+
+async def _measure(hass, send, updates: int) -> dict:
+    """Time send for updates updates, and trace a shorter run."""
+    writes = 0
+
+    @callback
+    def _state_changed(_):
+        nonlocal writes
+        writes += 1
+
+    remove = hass.bus.async_listen(
+        EVENT_STATE_CHANGED, _state_changed, run_immediately=True
+    )
+    try:
+        # Warm up, and let the entity reach its steady state
+        await _send(send, 0, CHUNK)
+
+        writes = 0
+        gc.collect()
+        started = time.perf_counter()
+        await _send(send, CHUNK, updates)
+        elapsed = time.perf_counter() - started
+        written = writes
+    finally:
+        remove()
+
+    gc.collect()
+    tracemalloc.start()
+    allocated = 0
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(TRACED_UPDATES):
+        current = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        send(i, 1)
+        allocated += tracemalloc.get_traced_memory()[1] - current
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    return {
+        "updates": updates,
+        "time": elapsed,
+        "rate": updates / elapsed,
+        "writes": written / updates,
+        "allocated": allocated / TRACED_UPDATES,
+        "retained": retained / TRACED_UPDATES,
+    }
+
+
+async def _send(send, first: int, count: int) -> None:
+    for chunk in range(first, first + count, CHUNK):
+        send(chunk, min(CHUNK, first + count - chunk))
+        await asyncio.sleep(0)
+
+
+def _entities(hass) -> dict[str, object]:
+    """Return one entity of each Plejd entity class."""
+    entities = {}
+    for platform in hass.data[DATA_ENTITY_PLATFORM]["plejd"]:
+        for entity in platform.entities.values():
+            entities.setdefault(type(entity).__name__, entity)
+    return entities
+
+
+async def micro(hass, site, updates: int) -> tuple[dict, list[str]]:
+    """Send updates to one entity of each class.
+
+    Returns the results, and the classes with no entity in the site.
+    """
+    results = {}
+    skipped = []
+    entities = _entities(hass)
+    clock = SteppingClock(1.0)
+    with patch.object(plejd_gesture, "time", clock):
+        for name in ENTITY_CLASSES:
+            if not (entity := entities.get(name)):
+                skipped.append(name)
+                continue
+            send, restore = _drive(entity, site)
+            try:
+                results[name] = await _measure(hass, send, updates)
+            finally:
+                restore()
+    return results, skipped
+
+
+async def _connected(simulation: MeshSimulation, timeout: float = 30) -> None:
+    """Wait until the integration has connected to the simulated gateway."""
+    deadline = time.monotonic() + timeout
+    while not (
+        simulation.client and gatt.PLEJD_LIGHTLEVEL in simulation.client._notify
+    ):
+        if time.monotonic() > deadline:
+            raise TimeoutError("Not connected to the simulated mesh")
+        await asyncio.sleep(0.1)
+    await asyncio.sleep(1)
+
+
+async def macro(hass, simulation: MeshSimulation, updates: int) -> dict:
+    """Send notifications for all outputs through pyplejd."""
+    client = simulation.client
+    rng = random.Random(0)
+    outputs = [
+        device
+        for device in simulation.manager.devices
+        if device.outputType in (dt.PlejdDeviceType.LIGHT, dt.PlejdDeviceType.SWITCH)
+    ]
+
+    lastdata = [
+        bytearray(
+            client.encrypt(
+                bytes(
+                    LastData(
+                        address=device.address,
+                        command=LastData.CMD_GROUP_OUTPUT_STATE_AND_LEVEL,
+                        payload=[i % 8 != 0, dim, dim],
+                    ).data
+                )
+            )
+        )
+        for i, (device, dim) in enumerate(
+            (rng.choice(outputs), rng.randrange(256)) for _ in range(STATES)
+        )
+    ]
+    lightlevel = []
+    for _ in range(STATES):
+        records = b""
+        for device in rng.sample(outputs, 2):
+            level = rng.randrange(256)
+            records += bytes(
+                [device.address, level > 0, 0, 0, 0, level, level, 0, 0, 0]
+            )
+        lightlevel.append(bytearray(records))
+
+    results = {}
+    for name, uuid, payloads in (
+        ("lastdata", gatt.PLEJD_LASTDATA, lastdata),
+        ("lightlevel", gatt.PLEJD_LIGHTLEVEL, lightlevel),
+    ):
+        notify = client._notify[uuid]
+
+        def send(first: int, count: int, notify=notify, payloads=payloads) -> None:
+            # The notifications are handled one after the other, as from bleak
+            for i in range(first, first + count):
+                coro = notify(None, payloads[i % STATES])
+                try:
+                    coro.send(None)
+                except StopIteration:
+                    pass
+                else:
+                    raise RuntimeError("Notification handling was suspended")
+
+        results[name] = await _measure(hass, send, updates)
+    return results
+
+
+async def run(devices: int, updates: int, output: str | None):
+    simulation = MeshSimulation(generate_site(devices), QUIET)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        with simulate(hass, simulation):
+            entry = await async_setup_simulated_entry(hass, simulation)
+            await hass.async_block_till_done()
+            await _connected(simulation)
+            site = hass.data["plejd"][entry.entry_id]
+            # Measure every write rather than how many are merged
+            site.state_writer.window = timedelta(0)
+
+            micro_results, skipped = await micro(hass, site, updates)
+            results = {
+                "micro": micro_results,
+                "macro": await macro(hass, simulation, updates),
+            }
+            await hass.async_stop(force=True)
+
+    print(
+        f"{'':<26} {'updates/s':>10} {'us/update':>10} {'writes':>7}"
+        f" {'allocated':>10} {'retained':>9}"
+    )
+    for kind, measurements in results.items():
+        print(kind)
+        for name, result in measurements.items():
+            print(
+                f"  {name:<24} {result['rate']:>10.0f} {1e6 / result['rate']:>10.1f}"
+                f" {result['writes']:>7.2f} {result['allocated'] / 1024:>8.1f}kB"
+                f" {result['retained']:>8.0f}B"
+            )
+    print("Writes, allocated and retained memory are per update.")
+    if skipped:
+        print(f"Skipped, not in the synthetic site: {', '.join(skipped)}")
+
+    if output:
+        write_results(
+            output,
+            "entity_updates",
+            results,
+            devices=devices,
+            updates=updates,
+            skipped=skipped,
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entity update benchmark")
+    parser.add_argument("--devices", type=int, default=DEFAULT_DEVICES)
+    parser.add_argument("--updates", type=int, default=DEFAULT_UPDATES)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.devices, args.updates, args.output))
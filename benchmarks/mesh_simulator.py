@@ -0,0 +1,629 @@
+"""Simulated Plejd mesh for running the integration without hardware.
+
+The simulation stands in for the Plejd cloud, the bluetooth integration and
+the GATT connection to the mesh gateway. Everything above that - the
+pyplejd manager, mesh and devices, and the whole integration - is the real
+thing. The simulated gateway keeps the state of every output, answers
+commands, polls and state requests, and generates traffic of its own:
+
+  state       a device is switched or dimmed from a wall switch
+  button      a button is clicked, or held and released
+  storm       a burst of button presses, e.g. a child playing with a switch
+  scene       a scene is triggered, and its devices report their new states
+  motion      a motion sensor triggers
+  disconnect  the gateway drops the connection
+
+Each kind of traffic happens at a configurable rate (per second, across the
+whole mesh), and every notification and acknowledged write is delayed by a
+random latency.
+
+Run on its own, it sets up the integration from a site data file (e.g. one
+written by synthetic_site.py) and reports what happened:
+
+usage: python benchmarks/mesh_simulator.py <site data file> [options]
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# The integration is loaded the way Home Assistant loads custom integrations
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from common import async_create_hass, add_config_entry
+
+from bleak import BleakError
+from bleak.backends.device import BLEDevice
+from bleak.backends.scanner import AdvertisementData
+from home_assistant_bluetooth import BluetoothServiceInfoBleak
+from homeassistant import config_entries
+from homeassistant.components.bluetooth.const import DATA_MANAGER
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+
+from pyplejd import PlejdManager, PLEJD_SERVICE, DeviceTypes as dt
+from pyplejd.ble import LastData, MiniPkg
+from pyplejd.ble import ble_characteristics as gatt
+from pyplejd.ble.crypto import encrypt_decrypt
+from pyplejd.cloud import PlejdCloudSite, site_details as sd
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds a cover takes to travel its full range
+COVER_TRAVEL_TIME = 20.0
+
+# Seconds a held button is held before it is released. Like the real
+# buttons, a click is only reported as a press, without a release
+BUTTON_HOLD_TIME = 1.0
+
+# Seconds between the presses of a button storm
+STORM_INTERVAL = 0.05
+
+
+@dataclass
+class SimulationConfig:
+    """Rates of the simulated traffic, in events per second across the mesh."""
+
+    state_rate: float = 1.0
+    button_rate: float = 0.1
+    # Share of the button presses which are held
+    button_hold_share: float = 0.2
+    storm_rate: float = 0.0
+    storm_size: int = 20
+    scene_rate: float = 0.01
+    motion_rate: float = 0.05
+    disconnect_rate: float = 0.0
+    # Range of the delay of notifications and acknowledged writes, in seconds
+    latency_min: float = 0.01
+    latency_max: float = 0.05
+    # Seconds between the advertisements of each device
+    advertisement_interval: float = 10.0
+    seed: int = 0
+
+
+class SimulatedCloudSite(PlejdCloudSite):
+    """Plejd cloud site which returns site data from a file."""
+
+    def __init__(self, *args, site_data: dict, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._site_json = json.dumps(site_data)
+
+    async def get_details(self) -> None:
+        # Like the cloud, every fetch returns a fresh copy of the data
+        self._details_raw = json.loads(self._site_json)
+        self.details = sd.SiteDetails(**self._details_raw)
+
+
+class SimulatedCharacteristic:
+    properties = ["write", "write-without-response"]
+
+    def __init__(self, uuid: str):
+        self.uuid = uuid
+
+
+class SimulatedServices:
+    def get_characteristic(self, uuid: str) -> SimulatedCharacteristic:
+        return SimulatedCharacteristic(uuid)
+
+
+class SimulatedClient:
+    """GATT client connected to the simulated gateway."""
+
+    def __init__(self, simulation: "MeshSimulation", address: str, disconnected):
+        self.simulation = simulation
+        self.address = address
+        self.services = SimulatedServices()
+        self.connected = True
+        self._disconnected = disconnected
+        self._notify = {}
+        self._ping = b"\x00"
+        self._time_request = False
+
+    def _check(self) -> None:
+        if not self.connected:
+            raise BleakError("Not connected")
+
+    def encrypt(self, data: bytes) -> bytes:
+        return encrypt_decrypt(self.simulation.crypto_key, self.address, data)
+
+    async def write_gatt_char(self, characteristic, data, response=True):
+        self._check()
+        uuid = getattr(characteristic, "uuid", characteristic)
+        if response:
+            await self.simulation.delay()
+            self._check()
+        self.simulation.counts["writes"] += 1
+        if uuid == gatt.PLEJD_DATA:
+            payload = bytes(self.encrypt(bytes(data)))
+            if payload[3:5] == b"\x00\x1b" and payload[2] == LastData.CMDT_READ:
+                self._time_request = True
+            self.simulation.received(payload)
+        elif uuid == gatt.PLEJD_LIGHTLEVEL:
+            self.simulation.polled()
+        elif uuid == gatt.PLEJD_PING:
+            self._ping = bytes(data)
+
+    async def read_gatt_char(self, characteristic):
+        self._check()
+        await self.simulation.delay()
+        uuid = getattr(characteristic, "uuid", characteristic)
+        if uuid == gatt.PLEJD_PING:
+            return bytes([(self._ping[0] + 1) & 0xFF])
+        if uuid == gatt.PLEJD_AUTH:
+            return os.urandom(16)
+        if uuid == gatt.PLEJD_LASTDATA and self._time_request:
+            # The mesh keeps local time
+            now = int(time.time() + 3600 * time.daylight)
+            self._time_request = False
+            return self.encrypt(
+                bytes([1, 1, 0x10, 0, 0x1B, *now.to_bytes(4, "little")])
+            )
+        return self.encrypt(bytes(10))
+
+    async def start_notify(self, characteristic, callback):
+        self._notify[getattr(characteristic, "uuid", characteristic)] = callback
+
+    async def stop_notify(self, characteristic):
+        self._notify.pop(getattr(characteristic, "uuid", characteristic), None)
+
+    async def disconnect(self):
+        self.connected = False
+        return True
+
+    def drop(self) -> None:
+        """Drop the connection from the gateway side."""
+        if self.connected:
+            self.connected = False
+            self._disconnected(self)
+
+    async def notify(self, uuid: str, data: bytes) -> None:
+        """Send a notification after the simulated latency."""
+        await self.simulation.delay()
+        if self.connected and (callback := self._notify.get(uuid)):
+            self.simulation.counts["notifications"] += 1
+            try:
+                await callback(None, bytearray(data))
+            except Exception:
+                # e.g. the connection dropped while the notification was handled
+                _LOGGER.debug("Error handling notification", exc_info=True)
+                self.simulation.counts["notification errors"] += 1
+
+
+class SimulatedManager(PlejdManager):
+    """Plejd manager which connects to the simulated mesh."""
+
+    def __init__(self, simulation: "MeshSimulation", **credentials):
+        super().__init__(**credentials)
+        self.simulation = simulation
+        self.cloud = simulation.cloud_site(**credentials)
+        simulation.manager = self
+
+    async def close_stale(self, device):
+        await self.simulation.delay()
+
+
+class SimulatedBluetooth:
+    """Stand-in for the bluetooth manager of Home Assistant."""
+
+    def __init__(self, simulation: "MeshSimulation"):
+        self.simulation = simulation
+        self._callbacks = []
+
+    def _service_infos(self):
+        if not (manager := self.simulation.manager):
+            return
+        rng = self.simulation.rng
+        for address, hw in manager.hardware.items():
+            if not hw._powered:
+                continue
+            mac = ":".join(address[i : i + 2] for i in range(0, 12, 2))
+            rssi = rng.randint(-90, -50)
+            yield BluetoothServiceInfoBleak(
+                name="P mesh",
+                address=mac,
+                rssi=rssi,
+                manufacturer_data={},
+                service_data={},
+                service_uuids=[PLEJD_SERVICE.lower()],
+                source=f"proxy-{rng.randrange(3)}",
+                device=BLEDevice(mac, "P mesh", None),
+                advertisement=AdvertisementData(
+                    "P mesh", {}, {}, [PLEJD_SERVICE.lower()], None, rssi, ()
+                ),
+                connectable=True,
+                time=time.monotonic(),
+                tx_power=None,
+            )
+
+    def async_discovered_service_info(self, connectable=True):
+        return list(self._service_infos())
+
+    def async_ble_device_from_address(self, address, connectable=True):
+        return BLEDevice(address, "P mesh", None)
+
+    def async_register_callback(self, callback, match_dict=None):
+        self._callbacks.append(callback)
+        return lambda: self._callbacks.remove(callback)
+
+    def advertise(self) -> None:
+        """Let every powered device advertise once."""
+        for service_info in self._service_infos():
+            for callback in list(self._callbacks):
+                callback(service_info, None)
+
+
+class MeshSimulation:
+    """The simulated mesh and the traffic on it."""
+
+    def __init__(self, site_data: dict, config: SimulationConfig | None = None):
+        self.site_data = site_data
+        self.config = config or SimulationConfig()
+        self.rng = random.Random(self.config.seed)
+        self.crypto_key = site_data["plejdMesh"]["cryptoKey"]
+        self.manager: SimulatedManager | None = None
+        self.client: SimulatedClient | None = None
+        self.bluetooth = SimulatedBluetooth(self)
+        self.counts = Counter()
+
+        # State of the outputs, by address
+        self.levels: dict[int, tuple[bool, int]] = {}
+        self.covers: dict[int, int] = {}
+
+        self._tasks: set[asyncio.Task] = set()
+        self._running = False
+
+    def cloud_site(self, **credentials) -> SimulatedCloudSite:
+        return SimulatedCloudSite(site_data=self.site_data, **credentials)
+
+    async def delay(self) -> None:
+        config = self.config
+        await asyncio.sleep(self.rng.uniform(config.latency_min, config.latency_max))
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    # The gateway connection
+
+    async def establish_connection(self, client_class, device, name, disconnected):
+        """Replacement for bleak_retry_connector.establish_connection."""
+        await self.delay()
+        self.counts["connections"] += 1
+        address = device.address.replace(":", "").upper()
+        self.client = SimulatedClient(self, address, disconnected)
+        return self.client
+
+    def _devices(self, output_type) -> list[dt.PlejdDevice]:
+        return [d for d in self.manager.devices if d.outputType == output_type]
+
+    def _level(self, device: dt.PlejdDevice) -> tuple[bool, int]:
+        return self.levels.setdefault(device.address, (False, 0))
+
+    def _lastdata(self, address: int, command: int, payload) -> None:
+        if self.client:
+            data = LastData(address=address, command=command, payload=payload).data
+            self._spawn(
+                self.client.notify(
+                    gatt.PLEJD_LASTDATA, self.client.encrypt(bytes(data))
+                )
+            )
+
+    def _report(self, device: dt.PlejdDevice) -> None:
+        """Let an output report its state."""
+        if device.outputType == dt.PlejdDeviceType.COVER:
+            position = self.covers.setdefault(device.address, 0)
+            self._lastdata(
+                device.address,
+                LastData.CMD_OUTPUT_STATE_AND_LEVEL,
+                [0, position, position],
+            )
+        else:
+            state, dim = self._level(device)
+            self._lastdata(
+                device.address,
+                LastData.CMD_GROUP_OUTPUT_STATE_AND_LEVEL,
+                [int(state), dim, dim],
+            )
+
+    def received(self, payload: bytes) -> None:
+        """Act on a payload written to the gateway."""
+        address, command_type = payload[0], payload[2]
+        command = int.from_bytes(payload[3:5], "big")
+        data = list(payload[5:])
+        devices = [d for d in self.manager.devices if d.address == address]
+        self.counts[f"command 0x{command:04x}"] += 1
+
+        if command == LastData.CMD_SCENE:
+            self._trigger_scene(data[0])
+        elif command_type == LastData.CMDT_READ:
+            if command == LastData.CMD_OUTPUT_STATE_AND_LEVEL:
+                for device in devices:
+                    self._report(device)
+        elif command == LastData.CMD_GROUP_OUTPUT_STATE:
+            for device in devices:
+                self.levels[address] = (bool(data[0]), self._level(device)[1])
+                self._report(device)
+        elif command == LastData.CMD_GROUP_OUTPUT_STATE_AND_LEVEL:
+            for device in devices:
+                self.levels[address] = (bool(data[0]), data[1])
+                self._report(device)
+        elif command == LastData.CMD_OUTPUT_SET:
+            packages = LastData(address=address, payload=data).minipkgs
+            for package in packages:
+                if package.type == MiniPkg.TPE_WINDOWCONTROL:
+                    target = (
+                        package.payload[1] * 0x7F // 0xFF
+                        if package.payload[0]
+                        else None
+                    )
+                    for device in devices:
+                        self._spawn(self._move_cover(device, target))
+
+    def polled(self) -> None:
+        """Report the level of every output, like the gateway does when polled."""
+        if not self.client:
+            return
+        records = []
+        for device in self.manager.devices:
+            if device.outputType == dt.PlejdDeviceType.COVER:
+                position = self.covers.setdefault(device.address, 0)
+                records.append(
+                    bytes([device.address, 0, 0, 0, 0, position, position, 0, 0, 0])
+                )
+            elif device.outputType in (
+                dt.PlejdDeviceType.LIGHT,
+                dt.PlejdDeviceType.SWITCH,
+            ):
+                state, dim = self._level(device)
+                level = (dim << 8 | dim).to_bytes(2, "little")
+                records.append(
+                    bytes([device.address, int(state), 0, 0, 0, *level, 0, 0, 0])
+                )
+        # Each notification has room for two devices
+        for i in range(0, len(records), 2):
+            self._spawn(
+                self.client.notify(gatt.PLEJD_LIGHTLEVEL, b"".join(records[i : i + 2]))
+            )
+
+    async def _move_cover(self, device: dt.PlejdDevice, target: int | None) -> None:
+        """Move a cover to target (0-127), or stop it if target is None."""
+        position = self.covers.setdefault(device.address, 0)
+        if target is None or target == position:
+            self._report(device)
+            return
+        opening = target > position
+        direction = 0x80 if opening else 0
+        self._lastdata(
+            device.address,
+            LastData.CMD_OUTPUT_STATE_AND_LEVEL,
+            [1, position | direction, target],
+        )
+        await asyncio.sleep(abs(target - position) / 0x7F * COVER_TRAVEL_TIME)
+        self.covers[device.address] = target
+        self._report(device)
+
+    def _trigger_scene(self, index: int) -> None:
+        scenes = {
+            scene.index: scene for scene in self._devices(dt.PlejdDeviceType.SCENE)
+        }
+        if not (scene := scenes.get(index)):
+            return
+        self._lastdata(scene.address, LastData.CMD_SCENE, [index])
+        scene_id = scene.identifier[0]
+        for step in self.site_data.get("sceneSteps", []):
+            if step.get("sceneId") != scene_id:
+                continue
+            for device in self.manager.devices:
+                if device.BLEaddress != step["deviceId"]:
+                    continue
+                value = step.get("value", 255)
+                if device.outputType in (
+                    dt.PlejdDeviceType.LIGHT,
+                    dt.PlejdDeviceType.SWITCH,
+                ):
+                    self.levels[device.address] = (step.get("state") == "On", value)
+                    self._report(device)
+                elif device.outputType == dt.PlejdDeviceType.COVER:
+                    self._spawn(self._move_cover(device, value * 0x7F // 0xFF))
+
+    # Traffic generated by the mesh
+
+    def start(self) -> None:
+        """Start generating traffic."""
+        self._running = True
+        config = self.config
+        for rate, generate in (
+            (config.state_rate, self._state_change),
+            (config.button_rate, self._button_press),
+            (config.storm_rate, self._button_storm),
+            (config.scene_rate, self._scene),
+            (config.motion_rate, self._motion),
+            (config.disconnect_rate, self._disconnect),
+        ):
+            if rate > 0:
+                self._spawn(self._generate(rate, generate))
+        if config.advertisement_interval > 0:
+            self._spawn(self._advertise(config.advertisement_interval))
+
+    def stop(self) -> None:
+        """Stop generating traffic."""
+        self._running = False
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _generate(self, rate: float, generate) -> None:
+        while self._running:
+            await asyncio.sleep(self.rng.expovariate(rate))
+            if self.client and self.client.connected:
+                await generate()
+
+    async def _advertise(self, interval: float) -> None:
+        while self._running:
+            await asyncio.sleep(interval)
+            self.bluetooth.advertise()
+
+    async def _state_change(self) -> None:
+        devices = self._devices(dt.PlejdDeviceType.LIGHT) + self._devices(
+            dt.PlejdDeviceType.SWITCH
+        )
+        if devices:
+            device = self.rng.choice(devices)
+            self.levels[device.address] = (
+                not self._level(device)[0],
+                self.rng.randrange(256),
+            )
+            self.counts["state"] += 1
+            self._report(device)
+
+    async def _press(self, button: dt.PlejdDevice, hold: bool = False) -> None:
+        address, input = button.deviceAddress, button.settings.input
+        self._lastdata(0, LastData.CMD_EVENT_FIRED, [address, input])
+        if hold:
+            await asyncio.sleep(BUTTON_HOLD_TIME)
+            self._lastdata(0, LastData.CMD_EVENT_FIRED, [address, input, 0])
+
+    async def _button_press(self) -> None:
+        if buttons := self._devices(dt.PlejdDeviceType.BUTTON):
+            self.counts["button"] += 1
+            hold = self.rng.random() < self.config.button_hold_share
+            self._spawn(self._press(self.rng.choice(buttons), hold))
+
+    async def _button_storm(self) -> None:
+        if buttons := self._devices(dt.PlejdDeviceType.BUTTON):
+            self.counts["storm"] += 1
+            button = self.rng.choice(buttons)
+            for _ in range(self.config.storm_size):
+                self._spawn(self._press(button))
+                await asyncio.sleep(STORM_INTERVAL)
+
+    async def _scene(self) -> None:
+        if scenes := self._devices(dt.PlejdDeviceType.SCENE):
+            self.counts["scene"] += 1
+            self._trigger_scene(self.rng.choice(scenes).index)
+
+    async def _motion(self) -> None:
+        if sensors := self._devices(dt.PlejdDeviceType.MOTION):
+            self.counts["motion"] += 1
+            source = MiniPkg(type=MiniPkg.TPE_SOURCE, payload=[MiniPkg.SRC_MOTION])
+            lux = MiniPkg(type=MiniPkg.TPE_LUX, payload=[self.rng.choice((1, 2))])
+            self._lastdata(
+                self.rng.choice(sensors).address,
+                LastData.CMD_OUTPUT_SET,
+                source.data + lux.data,
+            )
+
+    async def _disconnect(self) -> None:
+        self.counts["disconnect"] += 1
+        self.client.drop()
+
+
+@contextmanager
+def simulate(hass: HomeAssistant, simulation: MeshSimulation):
+    """Run the integration in hass against the simulated mesh."""
+    hass.data[DATA_MANAGER] = simulation.bluetooth
+    with (
+        patch(
+            "custom_components.plejd.plejd_site.PlejdManager",
+            lambda **credentials: SimulatedManager(simulation, **credentials),
+        ),
+        patch(
+            "custom_components.plejd.plejd_site.PlejdCloudSite",
+            simulation.cloud_site,
+        ),
+        patch("pyplejd.ble.establish_connection", simulation.establish_connection),
+    ):
+        try:
+            yield simulation
+        finally:
+            simulation.stop()
+            hass.data.pop(DATA_MANAGER, None)
+
+
+async def async_setup_simulated_entry(
+    hass: HomeAssistant, simulation: MeshSimulation
+) -> config_entries.ConfigEntry:
+    """Set up a Plejd config entry for the simulated site."""
+    # The simulation replaces the bluetooth integration, and the
+    # websocket API isn't needed without a frontend
+    hass.config.skip_pip = True
+    hass.config.components.update({"bluetooth_adapters", "websocket_api"})
+
+    entry = add_config_entry(
+        hass,
+        {
+            "username": "user@example.com",
+            "password": "password",
+            "siteId": simulation.site_data["site"]["siteId"],
+        },
+    )
+    await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state == config_entries.ConfigEntryState.LOADED, entry.state
+    return entry
+
+
+async def run(site_data: dict, config: SimulationConfig, duration: float):
+    simulation = MeshSimulation(site_data, config)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_create_hass(config_dir)
+        state_changes = Counter()
+
+        def _state_changed(event):
+            state_changes[event.data["entity_id"].split(".")[0]] += 1
+
+        hass.bus.async_listen(EVENT_STATE_CHANGED, _state_changed)
+
+        with simulate(hass, simulation):
+            start = time.perf_counter()
+            await async_setup_simulated_entry(hass, simulation)
+            setup = time.perf_counter() - start
+            await hass.async_block_till_done()
+
+            simulation.start()
+            started = time.perf_counter()
+            await asyncio.sleep(duration)
+            elapsed = time.perf_counter() - started
+            await hass.async_stop(force=True)
+
+    print(f"Set up {len(simulation.manager.devices)} devices in {setup:.2f} s")
+    print(f"Simulated {elapsed:.1f} s of mesh traffic:")
+    for name, count in sorted(simulation.counts.items()):
+        print(f"  {name:<24} {count:>8}")
+    print("State changes:")
+    for domain, count in sorted(state_changes.items()):
+        print(f"  {domain:<24} {count:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Plejd mesh")
+    parser.add_argument("filename", help="site data file (.json)")
+    parser.add_argument("--duration", type=float, default=30.0)
+    for field in fields(SimulationConfig):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=type(field.default),
+            default=field.default,
+        )
+    args = parser.parse_args()
+
+    with open(args.filename) as fp:
+        site_data = json.load(fp)
+    site_data = site_data.get("data", site_data)
+    config = SimulationConfig(
+        **{field.name: getattr(args, field.name) for field in fields(SimulationConfig)}
+    )
+    asyncio.run(run(site_data, config, args.duration))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare the compiled diagnostics redaction with the old in-place one.
+
+The old redaction wrote into the data it was given, so to leave the
+cached site data intact it has to work on a deep copy. Both are timed on
+synthetic sites, and the compiled redaction is checked to give the same
+result without modifying its input.
+
+usage: python benchmarks/redaction.py [device counts...]
+"""
+
+import copy
+import json
+import sys
+import time
+
+import common  # noqa: F401  (puts the integration on the path)
+from synthetic_site import generate_site
+
+from plejd.diagnostics import REDACT_KEYS, redact_site_data
+
+DEFAULT_COUNTS = [100, 500, 2000]
+REPEAT = 5
+
+
+def redact_in_place(data, keys: dict):
+    """The redaction diagnostics used before it was compiled."""
+    if isinstance(data, list):
+        return [redact_in_place(item, keys) for item in data]
+    for key, value in keys.items():
+        if key in data:
+            if value is True:
+                data[key] = "<REDACTED>"
+            else:
+                data[key] = redact_in_place(data[key], value)
+    return data
+
+
+def best_of(function, setup=lambda: ()) -> float:
+    """Return the best time of a few runs of function(*setup())."""
+    best = None
+    for _ in range(REPEAT):
+        args = setup()
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(counts: list[int]):
+    print(
+        f"{'devices':>8} {'size':>9} {'in place':>9} {'copy+in place':>14}"
+        f" {'compiled':>9}"
+    )
+    for count in counts:
+        data = generate_site(count)
+        size = len(json.dumps(data))
+        original = json.dumps(data, sort_keys=True)
+
+        redacted = redact_site_data(data)
+        assert json.dumps(data, sort_keys=True) == original, "input was modified"
+        assert redacted == redact_in_place(copy.deepcopy(data), REDACT_KEYS)
+
+        compiled = best_of(redact_site_data, lambda: (data,))
+        with_copy = best_of(lambda: redact_in_place(copy.deepcopy(data), REDACT_KEYS))
+        in_place = best_of(redact_in_place, lambda: (copy.deepcopy(data), REDACT_KEYS))
+
+        print(
+            f"{count:>8} {size / 1e6:>7.1f}MB {in_place * 1000:>7.1f}ms"
+            f" {with_copy * 1000:>12.1f}ms {compiled * 1000:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
@@ -0,0 +1,46 @@
+"""Machine readable benchmark results, for comparing across commits."""
+
+import json
+import os
+import platform
+import subprocess
+from importlib.metadata import PackageNotFoundError, version
+
+
+def revision() -> str | None:
+    """Return the commit being benchmarked."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(__file__),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _version(package: str) -> str | None:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return None
+
+
+def write_results(filename: str, benchmark: str, results: list, **settings) -> None:
+    """Write results with what is needed to compare them to other runs."""
+    with open(filename, "w") as fp:
+        json.dump(
+            {
+                "benchmark": benchmark,
+                "revision": revision(),
+                "python": platform.python_version(),
+                "homeassistant": _version("homeassistant"),
+                "pyplejd": _version("pyplejd"),
+                **settings,
+                "results": results,
+            },
+            fp,
+            indent=2,
+        )
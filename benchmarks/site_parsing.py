@@ -0,0 +1,132 @@
+"""Measure how the cost of parsing the site data grows with the site size.
+
+Synthetic sites are parsed in the stages of parse_json.py:
+
+  json_load      reading the diagnostics data file
+  validation     validating the site details with pydantic
+  entity_data    collecting the output, input and scene data
+  devices        constructing the device classes
+
+Each stage is timed (best of a few runs), and run once more under
+tracemalloc for its peak and retained memory. The results are printed,
+and written as JSON with --output so they can be compared across commits.
+
+usage: python benchmarks/site_parsing.py [--output FILE] [device counts...]
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from results import write_results
+from synthetic_site import generate_site
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from parse_json import load_details, parse_site, entity_data, build_devices
+
+DEFAULT_COUNTS = [10, 50, 200, 500, 1000, 2000]
+REPEAT = 5
+
+STAGES = ["json_load", "validation", "entity_data", "devices"]
+
+
+def run_stages(filename: str, measure) -> None:
+    """Run each stage on the output of the previous one through measure."""
+    details = measure("json_load", load_details, filename)
+    site = measure("validation", parse_site, details)
+    data = measure("entity_data", entity_data, site)
+    measure("devices", build_devices, *data)
+
+
+def time_stages(filename: str) -> dict[str, float]:
+    """Return the best time of each stage."""
+    times = {}
+
+    def measure(stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        elapsed = time.perf_counter() - start
+        times[stage] = min(times.get(stage, elapsed), elapsed)
+        return result
+
+    for _ in range(REPEAT):
+        run_stages(filename, measure)
+    return times
+
+
+def trace_stages(filename: str) -> dict[str, dict[str, int]]:
+    """Return the peak and retained memory of each stage."""
+    memory = {}
+
+    def measure(stage, function, *args):
+        gc.collect()
+        tracemalloc.start()
+        result = function(*args)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory[stage] = {"peak": peak, "retained": retained}
+        return result
+
+    run_stages(filename, measure)
+    return memory
+
+
+def benchmark(count: int, directory: str) -> dict:
+    """Return the measurements for a site with count devices."""
+    filename = os.path.join(directory, f"site-{count}.json")
+    with open(filename, "w") as fp:
+        json.dump({"data": generate_site(count)}, fp)
+
+    outputs, inputs, scenes = build_devices(
+        *entity_data(parse_site(load_details(filename)))
+    )
+    times = time_stages(filename)
+    memory = trace_stages(filename)
+    return {
+        "devices": count,
+        "size": os.path.getsize(filename),
+        "outputs": len(outputs),
+        "inputs": len(inputs),
+        "scenes": len(scenes),
+        "stages": {stage: {"time": times[stage], **memory[stage]} for stage in STAGES},
+        "total": sum(times.values()),
+    }
+
+
+def main(counts: list[int], output: str | None):
+    print(
+        f"{'devices':>8} {'size':>8} "
+        + " ".join(f"{stage:>12}" for stage in STAGES)
+        + f" {'total':>9} {'peak':>8}"
+    )
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for count in counts:
+            result = benchmark(count, directory)
+            results.append(result)
+            stages = result["stages"]
+            peak = max(stage["peak"] for stage in stages.values())
+            print(
+                f"{count:>8} {result['size'] / 1e6:>6.2f}MB "
+                + " ".join(
+                    f"{stages[stage]['time'] * 1000:>10.1f}ms" for stage in STAGES
+                )
+                + f" {result['total'] * 1000:>7.1f}ms {peak / 1e6:>6.1f}MB"
+            )
+
+    if output:
+        write_results(output, "site_parsing", results, repeat=REPEAT)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Site data parsing benchmark")
+    parser.add_argument("counts", nargs="*", type=int, default=DEFAULT_COUNTS)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+    main(args.counts, args.output)
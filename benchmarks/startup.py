@@ -0,0 +1,175 @@
+"""Measure how long a Plejd config entry takes to set up, and where it goes.
+
+The integration is set up against the simulated mesh (see mesh_simulator.py)
+for synthetic sites of a few sizes. Each site is started twice in the same
+config directory:
+
+  cold  the site data is fetched from the cloud and every device and
+        entity is new to the registries
+  warm  after a restart, with the site data and registries loaded from
+        disk, which is what most starts look like
+
+For each start, the phases PlejdSite.start() records are reported with
+the time until all entities are live, the time the entities of each
+platform took to be added, and the peak memory of the setup (from a
+separate run under tracemalloc). With --output, the results are written
+as JSON so they can be compared across commits.
+
+usage: python benchmarks/startup.py [--output FILE] [device counts...]
+"""
+
+import argparse
+import asyncio
+from collections import Counter
+import logging
+import tempfile
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from mesh_simulator import (
+    MeshSimulation,
+    SimulationConfig,
+    async_create_hass,
+    async_setup_simulated_entry,
+    simulate,
+)
+from results import write_results
+from synthetic_site import generate_site
+
+from homeassistant.helpers.entity_platform import EntityPlatform
+
+DEFAULT_COUNTS = [10, 50, 200, 500]
+REPEAT = 3
+
+PHASES = [
+    "store_load",
+    "manager_init",
+    "device_index",
+    "platform_setup",
+    "entity_creation",
+    "stale_connections",
+    "discovery_replay",
+]
+
+# No mesh traffic, so only the startup is measured
+QUIET = SimulationConfig(
+    state_rate=0,
+    button_rate=0,
+    scene_rate=0,
+    motion_rate=0,
+    advertisement_interval=0,
+    latency_min=0,
+    latency_max=0,
+)
+
+
+async def start(config_dir: str, site_data: dict, trace_memory: bool) -> dict:
+    """Set up the site in config_dir, stop it again and return the measurements."""
+    hass = await async_create_hass(config_dir)
+    simulation = MeshSimulation(site_data, QUIET)
+
+    platforms = Counter()
+    async_add_entities = EntityPlatform.async_add_entities
+
+    async def _timed_add_entities(platform, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await async_add_entities(platform, *args, **kwargs)
+        finally:
+            platforms[platform.domain] += time.perf_counter() - started
+
+    with (
+        simulate(hass, simulation),
+        patch.object(EntityPlatform, "async_add_entities", _timed_add_entities),
+    ):
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        entry = await async_setup_simulated_entry(hass, simulation)
+        setup = time.perf_counter() - started
+        await hass.async_block_till_done()
+        live = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        site = hass.data["plejd"][entry.entry_id]
+        entities = Counter(
+            entity_id.split(".")[0] for entity_id in hass.states.async_entity_ids()
+        )
+        result = {
+            "setup": setup,
+            "live": live,
+            "phases": {phase: site.startup.get(phase) for phase in PHASES},
+            "platforms": {
+                domain: {"time": platforms[domain], "entities": entities[domain]}
+                for domain in sorted(entities)
+            },
+            "entities": sum(entities.values()),
+            "peak": peak,
+        }
+
+        # Save the site data and registries for the next start
+        await hass.async_stop()
+    return result
+
+
+async def benchmark(count: int) -> list[dict]:
+    """Return the best cold and warm start of a site with count devices."""
+    site_data = generate_site(count)
+    best = {}
+    for _ in range(REPEAT):
+        with tempfile.TemporaryDirectory() as config_dir:
+            for kind in ("cold", "warm"):
+                result = await start(config_dir, site_data, False)
+                if kind not in best or result["live"] < best[kind]["live"]:
+                    best[kind] = result
+    with tempfile.TemporaryDirectory() as config_dir:
+        for kind in ("cold", "warm"):
+            best[kind]["peak"] = (await start(config_dir, site_data, True))["peak"]
+    return [{"devices": count, "start": kind, **best[kind]} for kind in best]
+
+
+def _ms(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+async def run(counts: list[int], output: str | None):
+    columns = ["total", "live", *PHASES, "peak"]
+    print(f"{'devices':>7} {'start':>5} " + " ".join(f"{c:>8.8}" for c in columns))
+    results = []
+    for count in counts:
+        for result in await benchmark(count):
+            results.append(result)
+            values = [
+                _ms(result["setup"]),
+                _ms(result["live"]),
+                *(_ms(result["phases"][phase]) for phase in PHASES),
+                f"{result['peak'] / 1e6:.0f}MB",
+            ]
+            print(
+                f"{count:>7} {result['start']:>5} "
+                + " ".join(f"{value:>8}" for value in values)
+            )
+            print(
+                " " * 14
+                + ", ".join(
+                    f"{domain} {_ms(platform['time'])}ms ({platform['entities']})"
+                    for domain, platform in result["platforms"].items()
+                )
+            )
+    print("Times in ms. Entities are added to the platforms concurrently.")
+
+    if output:
+        write_results(output, "startup", results, repeat=REPEAT)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Config entry startup benchmark")
+    parser.add_argument("counts", nargs="*", type=int, default=DEFAULT_COUNTS)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args.counts, args.output))
@@ -0,0 +1,322 @@
+"""Generate synthetic Plejd site data for the benchmarks.
+
+The data has the same layout as the site details returned by the Plejd
+cloud (and stored in diagnostics), including the parts pyplejd doesn't
+read, so it can be parsed by pyplejd and redacted like the real thing.
+
+usage: python benchmarks/synthetic_site.py <device count> [filename]
+"""
+
+import json
+import random
+import sys
+
+SITE_ID = "00000000-0000-0000-0000-000000000000"
+
+# Share of the devices of each kind
+DEVICE_KINDS = [
+    # hardware, hardwareId, outputType, traits, outputs, inputs, weight
+    ("DIM-01", "1", "LIGHT", 0x0B, 1, 1, 30),
+    ("DIM-02", "2", "LIGHT", 0x0B, 2, 2, 10),
+    ("DWN-01", "167", "LIGHT", 0x0F, 1, 0, 10),
+    ("REL-01", "7", "RELAY", 0x09, 1, 1, 15),
+    ("JAL-01", "16", "COVERABLE", 0x50, 1, 2, 5),
+    ("WPH-01", "6", None, 0x00, 0, 2, 25),
+    ("WMS-01", "70", None, 0x00, 0, 1, 5),
+    ("TRM-01", "36", None, 0x20, 1, 0, 3),
+]
+
+
+def _object(rng: random.Random, **fields) -> dict:
+    """Return a cloud object with the bookkeeping fields of the Plejd cloud."""
+    return {
+        "objectId": "".join(rng.choices("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", k=10)),
+        "createdAt": "2023-01-01T12:00:00.000Z",
+        "updatedAt": "2024-01-01T12:00:00.000Z",
+        "ACL": {"role:" + SITE_ID: {"read": True, "write": True}},
+        **fields,
+    }
+
+
+def _astro_table(rng: random.Random) -> dict:
+    return {
+        "sunrise": [f"0{rng.randint(4, 8)}:{rng.randint(10, 59)}" for _ in range(365)],
+        "sunset": [f"{rng.randint(15, 22)}:{rng.randint(10, 59)}" for _ in range(365)],
+    }
+
+
+def _next_address(address: int) -> int:
+    """Return the mesh address after address.
+
+    Mesh addresses are a single byte, so the addresses of large synthetic
+    sites are reused. 0 and 2 are not used for devices.
+    """
+    address = address % 254 + 1
+    return 3 if address == 2 else address
+
+
+def generate_site(device_count: int, seed: int = 0) -> dict:
+    """Return raw site data for a site with device_count physical devices."""
+    rng = random.Random(seed)
+
+    site = _object(
+        rng,
+        title=f"Synthetic site ({device_count} devices)",
+        siteId=SITE_ID,
+        version=1,
+        plejdMesh={"__type": "Pointer", "className": "PlejdMesh", "objectId": "mesh"},
+        astroTable=_astro_table(rng),
+        city="Synthetic",
+        coordinates={"latitude": 59.3, "longitude": 18.1},
+        country="SE",
+        deviceAstroTable={"index": list(range(365))},
+        zipCode="12345",
+        previousOwners=[],
+    )
+    data = {
+        "site": site,
+        "plejdMesh": _object(
+            rng,
+            siteId=SITE_ID,
+            plejdMeshId=f"{rng.getrandbits(128):032x}",
+            meshKey=f"{rng.getrandbits(128):032x}",
+            cryptoKey="-".join(
+                f"{rng.getrandbits(bits):0{bits // 4}x}"
+                for bits in (32, 16, 16, 16, 48)
+            ),
+        ),
+        "rooms": [],
+        "scenes": [],
+        "devices": [],
+        "plejdDevices": [],
+        "gateways": [],
+        "resourceSets": [],
+        "timeEvents": [],
+        "sceneSteps": [],
+        "astroEvents": [],
+        "inputSettings": [],
+        "outputSettings": [],
+        "motionSensors": [],
+        "stateTimers": {},
+        "sitePermission": _object(
+            rng,
+            siteId=SITE_ID,
+            userId="user",
+            user={"username": "user@example.com", "email": "user@example.com"},
+            locked=False,
+            isOwner=True,
+            isInstaller=False,
+            isUser=True,
+            site=site,
+        ),
+        "rxAddress": {},
+        "inputAddress": {},
+        "outputAddress": {},
+        "deviceAddress": {},
+        "outputGroups": {},
+        "roomAddress": {},
+        "sceneIndex": {},
+        "deviceLimit": max(device_count, 10) * 2,
+    }
+
+    room_count = device_count // 8 + 1
+    for index in range(room_count):
+        room_id = f"room-{index:04d}"
+        data["rooms"].append(
+            _object(
+                rng,
+                siteId=SITE_ID,
+                roomId=room_id,
+                title=f"Room {index}",
+                category="Living room",
+                imageHash=rng.getrandbits(31),
+            )
+        )
+        data["roomAddress"][room_id] = index + 1
+
+    weights = [kind[-1] for kind in DEVICE_KINDS]
+    address = 1
+    outputs = []
+    for index in range(device_count):
+        hardware, hardware_id, output_type, traits, n_out, n_in, _ = rng.choices(
+            DEVICE_KINDS, weights
+        )[0]
+        device_id = f"{index + 1:012X}"
+        room_id = f"room-{rng.randrange(room_count):04d}"
+        data["deviceAddress"][device_id] = address
+
+        data["plejdDevices"].append(
+            _object(
+                rng,
+                deviceId=device_id,
+                siteId=SITE_ID,
+                installer={"__type": "Pointer", "className": "_User", "objectId": "i"},
+                dirtyInstall=False,
+                dirtyUpdate=False,
+                dirtyClock=False,
+                dirtySettings=False,
+                hardwareId=hardware_id,
+                faceplateId="0",
+                firmware=_object(
+                    rng,
+                    notes=f"{hardware} 4.1.2",
+                    data={"name": f"{hardware}.hex", "url": "https://example.com"},
+                    metaData={"build": rng.getrandbits(32)},
+                    meshCommands={},
+                    version="4.1.2",
+                    buildTime=1700000000,
+                    firmwareApi="11",
+                ),
+                coordinates={"x": rng.random(), "y": rng.random()},
+                diagnostics="",
+                isFellowshipFollower=False,
+            )
+        )
+
+        if n_out == 0:
+            # Input only devices still have a device entry
+            first = _object(
+                rng,
+                deviceId=device_id,
+                siteId=SITE_ID,
+                title=f"{hardware} {index}",
+                traits=traits,
+                roomId=room_id,
+                outputType=None,
+            )
+            data["devices"].append(first)
+        for output in range(n_out):
+            device = _object(
+                rng,
+                deviceId=device_id,
+                siteId=SITE_ID,
+                title=f"{hardware} {index}" + (f" ({output + 1})" if n_out > 1 else ""),
+                traits=traits,
+                hiddenFromRoomList=False,
+                roomId=room_id,
+                hiddenFromIntegrations=False,
+                outputType=output_type,
+            )
+            if output == 0:
+                first = device
+            data["devices"].append(device)
+            settings = _object(
+                rng,
+                deviceId=device_id,
+                siteId=SITE_ID,
+                output=output,
+                deviceParseId=device["objectId"],
+                dimMin=0,
+                dimMax=255,
+                dimStart=0,
+                dimCurve="linear",
+                outputSpeed=1.0,
+                outputStartTime=0,
+                bootState="off",
+            )
+            if traits & 0x04:
+                settings["colorTemperature"] = {
+                    "minTemperature": 2200,
+                    "maxTemperature": 4000,
+                    "slewRate": 1,
+                    "behavior": "adjustable",
+                }
+            if traits & 0x10:
+                settings["coverableSettings"] = {
+                    "coverableTiltStart": -90,
+                    "coverableTiltEnd": 90,
+                }
+            if traits & 0x20:
+                settings["climateSettings"] = {
+                    "regulationMode": "Room",
+                    "temperatureLimits": {
+                        "maxFloorTemperature": 35,
+                        "minFloorTemperature": 5,
+                        "maxRoomTemperature": 30,
+                        "minRoomTemperature": 5,
+                        "maxUserInputTemperature": 30,
+                        "minUserInputTemperature": 5,
+                    },
+                }
+            data["outputSettings"].append(settings)
+            data["outputAddress"].setdefault(device_id, {})[str(output)] = address
+            outputs.append((device_id, output))
+            address = _next_address(address)
+
+        for input in range(n_in):
+            data["inputSettings"].append(
+                _object(
+                    rng,
+                    deviceId=device_id,
+                    siteId=SITE_ID,
+                    input=input,
+                    buttonType="DirectionUp" if input % 2 == 0 else "DirectionDown",
+                    dimSpeed=0,
+                    doubleSidedDirectionButton=False,
+                )
+            )
+            if hardware == "WMS-01":
+                data["motionSensors"].append(
+                    _object(
+                        rng,
+                        deviceId=device_id,
+                        siteId=SITE_ID,
+                        input=input,
+                        deviceParseId=first["objectId"],
+                        dirty=False,
+                        dirtyRemove=False,
+                        active=True,
+                    )
+                )
+            data["inputAddress"].setdefault(device_id, {})[str(input)] = address
+            address = _next_address(address)
+
+        data["timeEvents"].append(
+            _object(rng, siteId=SITE_ID, deviceId=device_id, schedule=[0] * 24)
+        )
+
+    for index in range(max(device_count // 10, 1)):
+        scene_id = f"scene-{index:04d}"
+        data["scenes"].append(
+            _object(
+                rng,
+                title=f"Scene {index}",
+                sceneId=scene_id,
+                siteId=SITE_ID,
+                hiddenFromSceneList=index % 5 == 4,
+                settings="",
+            )
+        )
+        data["sceneIndex"][scene_id] = index
+        for device_id, output in rng.sample(outputs, min(5, len(outputs))):
+            data["sceneSteps"].append(
+                _object(
+                    rng,
+                    sceneId=scene_id,
+                    siteId=SITE_ID,
+                    deviceId=device_id,
+                    output=output,
+                    state="On",
+                    value=rng.randrange(256),
+                    dirty=False,
+                    dirtyRemoved=False,
+                )
+            )
+
+    return data
+
+
+def main(device_count: int, filename: str | None):
+    data = generate_site(device_count)
+    if filename:
+        with open(filename, "w") as fp:
+            json.dump({"data": data}, fp)
+    else:
+        json.dump({"data": data}, sys.stdout)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print(__doc__.splitlines()[-1])
+        sys.exit()
+    main(int(sys.argv[1]), sys.argv[2] if len(sys.argv) == 3 else None)
@@ -5,26 +5,24 @@ from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD,
     EVENT_HOMEASSISTANT_STOP,
-    Platform,
 )
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers.typing import ConfigType
 
 from .const import DOMAIN, CONF_SITE_ID
 from .plejd_site import PlejdSite, ConnectionError, AuthenticationError
+from .websocket import async_register_websocket_commands
 
-PLATFORMS = [
-    Platform.LIGHT,
-    Platform.SWITCH,
-    Platform.SCENE,
-    Platform.EVENT,
-    Platform.BINARY_SENSOR,
-    Platform.COVER,
-    Platform.SENSOR,
-    Platform.CLIMATE,
-    Platform.NUMBER,
-]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Plejd integration."""
+    async_register_websocket_commands(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> bool:
@@ -40,8 +38,6 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
         siteId=config_entry.data.get(CONF_SITE_ID),
     )
 
-    await hass.config_entries.async_forward_entry_setups(config_entry, PLATFORMS)
-
     try:
         await site.start()
     except ConnectionError as err:
@@ -59,12 +55,13 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: ConfigEntry) -> b
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
 
-    unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    site: PlejdSite = hass.data[DOMAIN][entry.entry_id]
+
+    unload_ok = await hass.config_entries.async_unload_platforms(entry, site.platforms)
 
     if not unload_ok:
         return unload_ok
 
-    site: PlejdSite = hass.data[DOMAIN][entry.entry_id]
     await site.stop()
     del hass.data[DOMAIN][entry.entry_id]
 
@@ -80,10 +77,11 @@ async def async_remove_config_entry_device(
     site: PlejdSite = hass.data[DOMAIN][config_entry.entry_id]
     if not site:
         return True
-    for device in site.devices:
-        if device.hidden:
+    for domain, identifier in device_entry.identifiers:
+        if domain != DOMAIN:
             continue
-        if device.identifier in device_entry.identifiers:
-            return False
+        for device in site.devices_by_device_identifier.get(identifier, []):
+            if not device.hidden:
+                return False
 
     return True
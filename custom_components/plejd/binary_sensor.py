@@ -21,23 +21,25 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_motion_sensor(device: dt.PlejdMotionSensor, site: PlejdSite):
+    def async_add_motion_sensor(device: dt.PlejdMotionSensor, site: PlejdSite) -> list:
         """Add motion sensor from Plejd."""
         entity = PlejdMotionSensor(device, hass)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_motion_sensor, dt.PlejdDeviceType.MOTION
+        async_add_motion_sensor, dt.PlejdDeviceType.MOTION, async_add_entities
     )
 
     @callback
-    def async_add_diagnostic_sensors(device: dt.PlejdDevice, site: PlejdSite):
+    def async_add_diagnostic_sensors(device: dt.PlejdDevice, site: PlejdSite) -> list:
         """Add diagnostic sensors from Plejd."""
         gateway = PlejdGatewaySensor(device, hass)
         connectable = PlejdConnectableSensor(device, hass)
-        async_add_entities([gateway, connectable])
+        return [gateway, connectable]
 
-    site.register_platform_add_device_callback(async_add_diagnostic_sensors, "HW")
+    site.register_platform_add_device_callback(
+        async_add_diagnostic_sensors, "HW", async_add_entities
+    )
 
 
 class PlejdMotionSensor(PlejdDeviceBaseEntity, BinarySensorEntity):
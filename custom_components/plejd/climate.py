@@ -26,13 +26,13 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_climate(device: dt.PlejdThermostat, site: PlejdSite) -> None:
+    def async_add_climate(device: dt.PlejdThermostat, site: PlejdSite) -> list:
         """Add light from Plejd."""
         entity = PlejdClimate(device)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_climate, dt.PlejdDeviceType.CLIMATE
+        async_add_climate, dt.PlejdDeviceType.CLIMATE, async_add_entities
     )
 
 
@@ -62,6 +62,9 @@ class PlejdClimate(PlejdDeviceBaseEntity, ClimateEntity):
         PlejdDeviceBaseEntity.__init__(self, device)
         self.device: dt.PlejdThermostat
 
+    def _update_device_attributes(self) -> None:
+        """Read temperature limits from the device."""
+        super()._update_device_attributes()
         self.min_temp = self.device.limits.get("min", 7)
         self.max_temp = self.device.limits.get("max", 35)
 
@@ -3,17 +3,44 @@
 Provides user initiated configuration flow.
 Discovery of Plejd mesh devices through Bluetooth.
 Reauthentication when issues with cloud api credentials are reported.
+Options flow for tuning the mesh connection.
 """
 
 import voluptuous as vol
 import logging
 from typing import Any
-from homeassistant.config_entries import ConfigFlow, ConfigEntry, FlowResult
+from homeassistant.config_entries import (
+    ConfigFlow,
+    ConfigEntry,
+    FlowResult,
+    OptionsFlow,
+)
 from homeassistant.components import bluetooth
 from homeassistant.const import CONF_USERNAME, CONF_PASSWORD
+from homeassistant.core import callback
 
 from pyplejd import get_sites, verify_credentials, AuthenticationError, ConnectionError
-from .const import DOMAIN, CONF_SITE_ID, CONF_SITE_TITLE
+from .const import (
+    DOMAIN,
+    CONF_SITE_ID,
+    CONF_SITE_TITLE,
+    CONF_ADAPTIVE_KEEPALIVE,
+    CONF_DOUBLE_CLICK_WINDOW,
+    CONF_KEEPALIVE_IDLE,
+    CONF_LAST_SEEN_RESOLUTION,
+    CONF_LONG_PRESS_TIME,
+    CONF_OPTIMISTIC_DEADLINE,
+    CONF_OPTIMISTIC_STATE,
+    CONF_STATE_WRITE_WINDOW,
+    DEFAULT_ADAPTIVE_KEEPALIVE,
+    DEFAULT_DOUBLE_CLICK_WINDOW,
+    DEFAULT_KEEPALIVE_IDLE,
+    DEFAULT_LAST_SEEN_RESOLUTION,
+    DEFAULT_LONG_PRESS_TIME,
+    DEFAULT_OPTIMISTIC_DEADLINE,
+    DEFAULT_OPTIMISTIC_STATE,
+    DEFAULT_STATE_WRITE_WINDOW,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -29,6 +56,12 @@ class PlejdConfigFlow(ConfigFlow, domain=DOMAIN):
         self.reauth_config_entry: ConfigEntry | None = None
         self.sites: dict[str, str] = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: ConfigEntry) -> OptionsFlow:
+        """Get the options flow for this handler."""
+        return PlejdOptionsFlow(config_entry)
+
     async def async_step_bluetooth(self, _: Any) -> FlowResult:
         """Handle a discovered Plejd mesh."""
         if self._async_current_entries():
@@ -148,3 +181,75 @@ class PlejdConfigFlow(ConfigFlow, domain=DOMAIN):
             step_id="picksite",
             data_schema=vol.Schema({vol.Required("site"): vol.In(options)}),
         )
+
+
+class PlejdOptionsFlow(OptionsFlow):
+    """Handle Plejd options."""
+
+    def __init__(self, config_entry: ConfigEntry) -> None:
+        """Initialize the Plejd options flow"""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_ADAPTIVE_KEEPALIVE,
+                        default=options.get(
+                            CONF_ADAPTIVE_KEEPALIVE, DEFAULT_ADAPTIVE_KEEPALIVE
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_KEEPALIVE_IDLE,
+                        default=options.get(
+                            CONF_KEEPALIVE_IDLE, DEFAULT_KEEPALIVE_IDLE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60, max=3600)),
+                    vol.Required(
+                        CONF_STATE_WRITE_WINDOW,
+                        default=options.get(
+                            CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=2000)),
+                    vol.Required(
+                        CONF_LAST_SEEN_RESOLUTION,
+                        default=options.get(
+                            CONF_LAST_SEEN_RESOLUTION, DEFAULT_LAST_SEEN_RESOLUTION
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3600)),
+                    vol.Required(
+                        CONF_DOUBLE_CLICK_WINDOW,
+                        default=options.get(
+                            CONF_DOUBLE_CLICK_WINDOW, DEFAULT_DOUBLE_CLICK_WINDOW
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=100, max=2000)),
+                    vol.Required(
+                        CONF_LONG_PRESS_TIME,
+                        default=options.get(
+                            CONF_LONG_PRESS_TIME, DEFAULT_LONG_PRESS_TIME
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=200, max=5000)),
+                    vol.Required(
+                        CONF_OPTIMISTIC_STATE,
+                        default=options.get(
+                            CONF_OPTIMISTIC_STATE, DEFAULT_OPTIMISTIC_STATE
+                        ),
+                    ): bool,
+                    vol.Required(
+                        CONF_OPTIMISTIC_DEADLINE,
+                        default=options.get(
+                            CONF_OPTIMISTIC_DEADLINE, DEFAULT_OPTIMISTIC_DEADLINE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=500, max=30000)),
+                }
+            ),
+        )
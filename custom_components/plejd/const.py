@@ -5,3 +5,24 @@ MANUFACTURER = "Plejd"
 
 CONF_SITE_ID = "siteId"
 CONF_SITE_TITLE = "siteTitle"
+
+CONF_ADAPTIVE_KEEPALIVE = "adaptive_keepalive"
+CONF_KEEPALIVE_IDLE = "keepalive_idle"
+CONF_STATE_WRITE_WINDOW = "state_write_window"
+CONF_LAST_SEEN_RESOLUTION = "last_seen_resolution"
+CONF_DOUBLE_CLICK_WINDOW = "double_click_window"
+CONF_LONG_PRESS_TIME = "long_press_time"
+CONF_OPTIMISTIC_STATE = "optimistic_state"
+CONF_OPTIMISTIC_DEADLINE = "optimistic_deadline"
+
+DEFAULT_ADAPTIVE_KEEPALIVE = True
+DEFAULT_KEEPALIVE_IDLE = 600
+DEFAULT_STATE_WRITE_WINDOW = 100
+DEFAULT_LAST_SEEN_RESOLUTION = 60
+DEFAULT_DOUBLE_CLICK_WINDOW = 400
+DEFAULT_LONG_PRESS_TIME = 800
+DEFAULT_OPTIMISTIC_STATE = False
+DEFAULT_OPTIMISTIC_DEADLINE = 3000
+
+SIGNAL_DEVICE_CHANGED = "plejd_device_changed_{}"
+SIGNAL_DEVICE_REMOVED = "plejd_device_removed_{}"
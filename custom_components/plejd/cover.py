@@ -1,13 +1,33 @@
 """Support for Plejd covers."""
 
+from datetime import datetime, timedelta
+import time
 from typing import Any
 from homeassistant.components.cover import CoverEntity, CoverEntityFeature
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import callback, HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, callback, HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
 
 from .plejd_site import dt, get_plejd_site_from_config_entry, PlejdSite
 from .plejd_entity import PlejdDeviceBaseEntity
+from .plejd_motion import PlejdCoverMotion
+
+# How often the estimated position of a moving cover is updated
+MOTION_UPDATE_INTERVAL = timedelta(seconds=1)
+
+
+def angle_to_tilt_position(angle: float, tilt_range: tuple[int, int]) -> int:
+    """Return the tilt position in percent of an angle in the tilt range."""
+    start, end = tilt_range
+    return round(min(max((angle - start) * 100 / (end - start), 0), 100))
+
+
+def tilt_position_to_angle(position: int, tilt_range: tuple[int, int]) -> int:
+    """Return the angle in the tilt range of a tilt position in percent."""
+    start, end = tilt_range
+    return round(start + position * (end - start) / 100)
 
 
 async def async_setup_entry(
@@ -19,13 +39,13 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_cover(device: PlejdCover, site: PlejdSite) -> None:
+    def async_add_cover(device: PlejdCover, site: PlejdSite) -> list:
         """Add light from Plejd."""
         entity = PlejdCover(device)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_cover, dt.PlejdDeviceType.COVER
+        async_add_cover, dt.PlejdDeviceType.COVER, async_add_entities
     )
 
 
@@ -37,22 +57,106 @@ class PlejdCover(PlejdDeviceBaseEntity, CoverEntity):
         PlejdDeviceBaseEntity.__init__(self, device)
         self.device: PlejdCover
 
+        self.motion = PlejdCoverMotion()
+        self._expected_stop: datetime | None = None
+        self._cancel_motion_updates: CALLBACK_TYPE | None = None
+
+    def _update_device_attributes(self) -> None:
+        """Read the tilt range from the device settings."""
+        super()._update_device_attributes()
+        settings = getattr(self.device, "settings", None)
+        coverable = getattr(settings, "coverableSettings", None)
+        self._tilt_range: tuple[int, int] | None = None
         self._attr_supported_features = (
             CoverEntityFeature.OPEN
             | CoverEntityFeature.CLOSE
             | CoverEntityFeature.STOP
             | CoverEntityFeature.SET_POSITION
-            # | CoverEntityFeature.SET_TILT_POSITION
         )
+        if (
+            coverable
+            and coverable.coverableTiltStart is not None
+            and coverable.coverableTiltEnd is not None
+            and coverable.coverableTiltStart != coverable.coverableTiltEnd
+        ):
+            self._tilt_range = (
+                coverable.coverableTiltStart,
+                coverable.coverableTiltEnd,
+            )
+        self._update_tilt_support()
+
+    def _update_tilt_support(self) -> None:
+        # pyplejd doesn't decode the tilt the covers report, so tilting is
+        # only offered once the cover has reported its tilt
+        if self._tilt_range and self._data.get("angle") is not None:
+            self._attr_supported_features |= CoverEntityFeature.SET_TILT_POSITION
+
+    @callback
+    def _handle_update(self, data) -> None:
+        """Update the motion model from the reported state."""
+        self.motion.update(
+            bool(data.get("moving")),
+            bool(data.get("opening")),
+            data.get("position"),
+            time.monotonic(),
+        )
+        self._update_motion()
+        self._update_tilt_support()
+
+    def _update_motion(self) -> None:
+        """Predict when the cover stops and update the position while moving."""
+        stop = self.motion.predicted_stop()
+        self._expected_stop = (
+            dt_util.utcnow() + timedelta(seconds=stop - time.monotonic())
+            if stop is not None
+            else None
+        )
+        if stop is not None and not self._cancel_motion_updates:
+            self._cancel_motion_updates = async_track_time_interval(
+                self.hass, self._async_motion_update, MOTION_UPDATE_INTERVAL
+            )
+        elif stop is None:
+            self._stop_motion_updates()
+
+    @callback
+    def _async_motion_update(self, *_) -> None:
+        """Write the estimated position of the moving cover."""
+        stop = self.motion.predicted_stop()
+        if stop is None or time.monotonic() > stop:
+            self._stop_motion_updates()
+        self._async_write_state()
+
+    def _stop_motion_updates(self) -> None:
+        if self._cancel_motion_updates:
+            self._cancel_motion_updates()
+            self._cancel_motion_updates = None
+
+    async def async_will_remove_from_hass(self) -> None:
+        """When entity will be removed from hass."""
+        self._stop_motion_updates()
+        return await super().async_will_remove_from_hass()
 
     @property
     def current_cover_position(self) -> int | None:
+        if (
+            self.motion.moving
+            and (estimate := self.motion.estimate(time.monotonic())) is not None
+        ):
+            return round(estimate)
         return self._data.get("position", 0)
 
     @property
     def current_cover_tilt_position(self) -> int | None:
-        return None
-        return self._data.get("angle", None)
+        angle = self._data.get("angle")
+        if angle is None or not self._tilt_range:
+            return None
+        return angle_to_tilt_position(angle, self._tilt_range)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        if self._expected_stop is None:
+            return None
+        return {"expected_stop": self._expected_stop.replace(microsecond=0)}
 
     @property
     def is_closed(self) -> bool | None:
@@ -70,16 +174,46 @@ class PlejdCover(PlejdDeviceBaseEntity, CoverEntity):
             return False
         return self._data.get("opening")
 
+    def _expected_motion(self, position: int | None) -> dict | None:
+        """Return the state the cover reports when it starts moving to position."""
+        current = self._reported.get("position")
+        if position is None or (current is not None and abs(current - position) <= 1):
+            return None
+        expected = {"moving": True}
+        if current is not None:
+            expected["opening"] = position > current
+        return expected
+
+    def _set_target(self, position: int | None) -> None:
+        self.motion.target = position
+        self._update_motion()
+
     async def async_open_cover(self, **kwargs: Any) -> None:
-        await self.device.open()
+        self._set_target(100)
+        await self._async_send("open", expected=self._expected_motion(100))
 
     async def async_close_cover(self, **kwargs: Any) -> None:
-        await self.device.close()
+        self._set_target(0)
+        await self._async_send("close", expected=self._expected_motion(0))
 
     async def async_stop_cover(self, **kwargs: Any) -> None:
-        await self.device.stop()
+        self._set_target(None)
+        expected = {"moving": False} if self._reported.get("moving") else None
+        await self._async_send("stop", expected=expected)
 
     async def async_set_cover_position(
         self, position: int | None = None, **kwargs: Any
     ) -> None:
-        await self.device.set_position(position)
+        self._set_target(position)
+        await self._async_send(
+            "set_position", expected=self._expected_motion(position), position=position
+        )
+
+    async def async_set_cover_tilt_position(
+        self, tilt_position: int | None = None, **kwargs: Any
+    ) -> None:
+        if tilt_position is None or not self._tilt_range:
+            return
+        await self._async_send(
+            "set_position", tilt=tilt_position_to_angle(tilt_position, self._tilt_range)
+        )
@@ -1,6 +1,6 @@
 """Diagnostic support for Plejd."""
 
-from typing import TypeVar
+from typing import Any, Callable
 from pyplejd import PlejdManager
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
@@ -61,20 +61,45 @@ REDACT_KEYS = {
     },
 }
 
-T = TypeVar("T", dict, list)
+REDACTED = "<REDACTED>"
 
 
-def redact(data: T, keys: dict) -> T:
-    """Recursively redact potentially sensitive information from Plejd Site data."""
-    if isinstance(data, list):
-        return [redact(item, keys) for item in data]
-    for key, value in keys.items():
-        if key in data:
-            if value is True:
-                data[key] = "<REDACTED>"
-            else:
-                data[key] = redact(data[key], value)
-    return data
+def compile_redaction(keys: dict) -> Callable[[Any], Any]:
+    """Compile a key spec into a function which redacts Plejd Site data.
+
+    The data passed in is never modified. Dicts and lists which contain
+    something to redact are copied, everything else is shared with the
+    original, so it is safe to redact the cached site data.
+    """
+    plan = tuple(
+        (key, None if rule is True else compile_redaction(rule))
+        for key, rule in keys.items()
+    )
+
+    def _redact(data):
+        if isinstance(data, list):
+            items = [_redact(item) for item in data]
+            if any(new is not old for new, old in zip(items, data)):
+                return items
+            return data
+        if not isinstance(data, dict):
+            return data
+        redacted = None
+        for key, redact_value in plan:
+            if key not in data:
+                continue
+            value = REDACTED if redact_value is None else redact_value(data[key])
+            if value is data[key]:
+                continue
+            if redacted is None:
+                redacted = dict(data)
+            redacted[key] = value
+        return data if redacted is None else redacted
+
+    return _redact
+
+
+redact_site_data = compile_redaction(REDACT_KEYS)
 
 
 async def async_get_config_entry_diagnostics(
@@ -85,4 +110,4 @@ async def async_get_config_entry_diagnostics(
     site: PlejdSite = get_plejd_site_from_config_entry(hass, config_entry)
     plejdManager: PlejdManager = site.manager
     sitedata = await plejdManager.get_raw_sitedata()
-    return redact(sitedata, REDACT_KEYS)
+    return {**redact_site_data(sitedata), "runtime": site.diagnostics()}
@@ -1,21 +1,24 @@
 """Support for Plejd events."""
 
 from datetime import timedelta
+import time
 
 from homeassistant.components.event import EventEntity, EventDeviceClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
-from homeassistant.util import Throttle
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .plejd_site import dt, get_plejd_site_from_config_entry, PlejdSite
 from .plejd_entity import PlejdDeviceBaseEntity
+from .plejd_gesture import GESTURES, PlejdGestures
 
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
-SCENE_ACTIVATION_RATE_LIMIT = timedelta(seconds=2)
+# The mesh may repeat a scene activation, and repeats within this window
+# are not reported as new activations
+SCENE_ACTIVATION_REPEAT_WINDOW = timedelta(seconds=2)
 
 
 async def async_setup_entry(
@@ -27,22 +30,22 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_button_event(device: dt.PlejdButton, site: PlejdSite):
+    def async_add_button_event(device: dt.PlejdButton, site: PlejdSite) -> list:
         """Add button events from Plejd."""
-        entity = PlejdButtonEvent(device)
-        async_add_entities([entity])
+        entity = PlejdButtonEvent(device, site.gestures)
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_button_event, dt.PlejdDeviceType.BUTTON
+        async_add_button_event, dt.PlejdDeviceType.BUTTON, async_add_entities
     )
 
     @callback
-    def async_add_scene_event(scene: dt.PlejdScene, site: PlejdSite):
+    def async_add_scene_event(scene: dt.PlejdScene, site: PlejdSite) -> list:
         entity = PlejdSceneEvent(scene)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_scene_event, dt.PlejdDeviceType.SCENE
+        async_add_scene_event, dt.PlejdDeviceType.SCENE, async_add_entities
     )
 
 
@@ -51,59 +54,81 @@ class PlejdSceneEvent(PlejdDeviceBaseEntity, EventEntity):
 
     _attr_has_entity_name = True
     _attr_event_types = ["activated"]
-    device_info = None
+    _coalesce_state_writes = False
 
     def __init__(self, device: dt.PlejdScene) -> None:
         """Set up event."""
         super().__init__(device)
         self.device: dt.PlejdScene
+        self._last_activation: float | None = None
 
-    @property
-    def name(self) -> str:
-        """Return name of the event entity."""
-        return self.device.name + " activated"
+    def _device_info(self) -> None:
+        """Scenes don't belong to a device."""
+        return None
 
-    @property
-    def unique_id(self) -> str:
-        """Return unique identifier for the event entity."""
-        return super().unique_id + ":activated"
+    def _update_device_attributes(self) -> None:
+        """Read the name of the scene."""
+        super()._update_device_attributes()
+        self._attr_name = self.device.name + " activated"
+        self._attr_unique_id += ":activated"
 
-    @Throttle(SCENE_ACTIVATION_RATE_LIMIT)
     @callback
     def _handle_update(self, event) -> None:
         """When scene is activated from Plejd."""
-        if event.get("triggered", False):
-            self._trigger_event("activated")
+        if not event.get("triggered", False):
+            return
+        now = time.monotonic()
+        if self._last_activation and (
+            now - self._last_activation < SCENE_ACTIVATION_REPEAT_WINDOW.total_seconds()
+        ):
+            return
+        self._last_activation = now
+        self._trigger_event("activated")
 
 
 class PlejdButtonEvent(PlejdDeviceBaseEntity, EventEntity):
     """Event for button presses in Plejd."""
 
     _attr_has_entity_name = True
-    _attr_event_types = ["press", "release"]
+    _attr_event_types = GESTURES
     _attr_device_class = EventDeviceClass.BUTTON
+    _coalesce_state_writes = False
+    _write_on_update = False
 
-    def __init__(self, device: dt.PlejdButton) -> None:
+    def __init__(self, device: dt.PlejdButton, gestures: PlejdGestures) -> None:
         """Set up event."""
         super().__init__(device)
         self.device: dt.PlejdButton
+        self.gesture_engine = gestures.engine(self._async_trigger)
+        self._written_available: bool | None = None
 
-    @property
-    def name(self) -> str:
-        """Return the name of the event entity."""
-        return f"{self.device.button_id+1} pressed"
+    def _update_device_attributes(self) -> None:
+        """Read the number of the button."""
+        super()._update_device_attributes()
+        self._attr_name = f"{self.device.button_id+1} pressed"
+        self._attr_unique_id += ":press"
 
-    @property
-    def unique_id(self) -> str:
-        """Return unique identifier for the event entity."""
-        return super().unique_id + ":press"
-
-    # @Throttle(SCENE_ACTIVATION_RATE_LIMIT)
     @callback
     def _handle_update(self, event) -> None:
         """When a button is pushed from Plejd."""
-        action = event.get("action")
-        if action == "press":
-            self._trigger_event("press")
-        elif action == "release":
-            self._trigger_event("release")
+        if action := event.get("action"):
+            self.gesture_engine.handle(action)
+        # Gestures write the state, other updates only if availability changed
+        if self.available != self._written_available:
+            self._async_write_button_state()
+
+    @callback
+    def _async_trigger(self, gesture: str) -> None:
+        """When a gesture is recognized."""
+        self._trigger_event(gesture)
+        self._async_write_button_state()
+
+    @callback
+    def _async_write_button_state(self) -> None:
+        self._written_available = self.available
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """When entity will be removed from hass."""
+        self.gesture_engine.stop()
+        return await super().async_will_remove_from_hass()
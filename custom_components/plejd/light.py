@@ -18,13 +18,13 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_light(device: dt.PlejdLight, site: PlejdSite) -> None:
+    def async_add_light(device: dt.PlejdLight, site: PlejdSite) -> list:
         """Add light from Plejd."""
         entity = PlejdLight(device)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_light, dt.PlejdDeviceType.LIGHT
+        async_add_light, dt.PlejdDeviceType.LIGHT, async_add_entities
     )
 
 
@@ -37,20 +37,25 @@ class PlejdLight(PlejdDeviceBaseEntity, LightEntity):
         PlejdDeviceBaseEntity.__init__(self, device)
         self.device: dt.PlejdLight
 
-        self._attr_supported_color_modes: set[ColorMode] = set()
+    def _update_device_attributes(self) -> None:
+        """Read the color mode from the device."""
+        super()._update_device_attributes()
+        device = self.device
         if device.colortemp:
-            self._attr_supported_color_modes.add(ColorMode.COLOR_TEMP)
+            self._attr_color_mode = ColorMode.COLOR_TEMP
             self._attr_min_color_temp_kelvin = device.colortemp[0]
             self._attr_max_color_temp_kelvin = device.colortemp[1]
         elif device.dimmable:
-            self._attr_supported_color_modes.add(ColorMode.BRIGHTNESS)
+            self._attr_color_mode = ColorMode.BRIGHTNESS
         else:
-            self._attr_supported_color_modes.add(ColorMode.ONOFF)
+            self._attr_color_mode = ColorMode.ONOFF
+        self._attr_supported_color_modes = {self._attr_color_mode}
+        self._always_on = device.outputType == "COVERABLE"
 
     @property
     def is_on(self) -> bool:
         """Returns true if light is on."""
-        if self.device.outputType == "COVERABLE":
+        if self._always_on:
             return True
         return self._data.get("state", False)
 
@@ -64,21 +69,17 @@ class PlejdLight(PlejdDeviceBaseEntity, LightEntity):
         """Returns the current color temperature of the light."""
         return self._data.get("colortemp", None)
 
-    @property
-    def color_mode(self) -> str:
-        """Returns the current color mode of the light."""
-        if self.device.colortemp:
-            return ColorMode.COLOR_TEMP
-        if self.device.dimmable:
-            return ColorMode.BRIGHTNESS
-        return ColorMode.ONOFF
-
     async def async_turn_on(
         self, brightness: int | None = None, color_temp: int | None = None, **_
     ) -> None:
         """Turn the light on."""
-        await self.device.turn_on(brightness, color_temp)
+        expected = {"state": True}
+        if brightness is not None:
+            expected["dim"] = brightness
+        await self._async_send(
+            "turn_on", expected=expected, dim=brightness, colortemp=color_temp
+        )
 
     async def async_turn_off(self, **_) -> None:
         """Turn the light off."""
-        await self.device.turn_off()
+        await self._async_send("turn_off", expected={"state": False})
@@ -20,12 +20,14 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_number(device: dt.PlejdThermostat, site: PlejdSite) -> None:
+    def async_add_number(device: dt.PlejdThermostat, site: PlejdSite) -> list:
         """Add light from Plejd."""
         entity = PlejdPWMClimate(device)
-        async_add_entities([entity])
+        return [entity]
 
-    site.register_platform_add_device_callback(async_add_number, dt.PlejdDeviceType.PWM)
+    site.register_platform_add_device_callback(
+        async_add_number, dt.PlejdDeviceType.PWM, async_add_entities
+    )
 
 
 class PlejdPWMClimate(PlejdDeviceBaseEntity, NumberEntity):
@@ -40,6 +42,9 @@ class PlejdPWMClimate(PlejdDeviceBaseEntity, NumberEntity):
         PlejdDeviceBaseEntity.__init__(self, device)
         self.device: dt.PlejdThermostat
 
+    def _update_device_attributes(self) -> None:
+        """Read limits from the device."""
+        super()._update_device_attributes()
         self._attr_native_min_value = self.device.limits.get("min", 0)
         self._attr_native_max_value = self.device.limits.get("max", 100)
         self._attr_native_step = self.device.limits.get("step", 5)
@@ -0,0 +1,269 @@
+"""Plejd mesh command queue."""
+
+import asyncio
+import binascii
+from collections import Counter
+from datetime import timedelta
+import logging
+import time
+
+from bleak import BleakError
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from pyplejd import PlejdManager, DeviceTypes as dt
+from pyplejd.ble import ble_characteristics as gatt
+from pyplejd.ble.crypto import encrypt_decrypt
+
+from .plejd_scheduler import MeshPriority, PlejdMeshBusy, PlejdMeshScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Commands which arrive this close together are sent in one batch
+COMMAND_COLLECT_WINDOW = timedelta(milliseconds=10)
+
+# Number of payloads written before waiting for the gateway to acknowledge
+COMMAND_BURST = 8
+
+# Commands whose arguments are merged when one replaces another
+MERGED_COMMANDS = ("turn_on", "set_position")
+
+
+class PlejdCommand:
+    """A command for a device, and the callers waiting for it to be sent."""
+
+    __slots__ = ("device", "name", "kwargs", "waiters")
+
+    def __init__(self, device: dt.PlejdDevice, name: str, kwargs: dict) -> None:
+        self.device = device
+        self.name = name
+        self.kwargs = kwargs
+        self.waiters: list[asyncio.Future] = []
+
+    @property
+    def kind(self) -> str:
+        """Return what the command sets on the device.
+
+        Only commands which set the same thing replace each other, so that
+        e.g. tilting a cover doesn't drop the command which opens it.
+        """
+        if self.name == "set_position" and self.kwargs.get("position") is None:
+            return "tilt"
+        return "output"
+
+    def supersede(self, previous: "PlejdCommand") -> None:
+        """Take the place of an earlier command of the same kind."""
+        if previous.name == self.name and self.name in MERGED_COMMANDS:
+            # Keep e.g. the brightness when only the color temperature changes
+            self.kwargs = {
+                **previous.kwargs,
+                **{
+                    key: value
+                    for key, value in self.kwargs.items()
+                    if value is not None
+                },
+            }
+        self.waiters = previous.waiters + self.waiters
+
+    def finish(self, err: BaseException | None = None) -> None:
+        for waiter in self.waiters:
+            if waiter.done():
+                continue
+            if isinstance(err, asyncio.CancelledError):
+                waiter.cancel()
+            elif err:
+                waiter.set_exception(err)
+            else:
+                waiter.set_result(None)
+
+
+class PayloadRecorder:
+    """Stand-in for the mesh which records what a device would write to it."""
+
+    def __init__(self) -> None:
+        self.payloads: list[str] = []
+
+    async def write(self, *payloads: str) -> bool:
+        self.payloads.extend(payloads)
+        return True
+
+
+class PlejdCommandQueue:
+    """Collects commands for devices and sends them to the mesh in batches.
+
+    Commands which arrive within a short window are collected, and a later
+    command for a device replaces any earlier one of the same kind which
+    hasn't been sent.
+    The payloads of a batch are then written back to back over the gateway
+    connection, without waiting for each to be acknowledged if the gateway
+    allows it.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        manager: PlejdManager,
+        scheduler: PlejdMeshScheduler,
+    ) -> None:
+        """Initialize command queue."""
+        self.hass = hass
+        self.manager = manager
+        self.scheduler = scheduler
+        self.window = COMMAND_COLLECT_WINDOW
+        self.counts: Counter[str] = Counter()
+        # When each device was last sent a command, for resync ordering
+        self.last_used: dict[dt.PlejdDevice, float] = {}
+
+        self._pending: dict[tuple[dt.PlejdDevice, str], PlejdCommand] = {}
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, device: dt.PlejdDevice, name: str, **kwargs) -> None:
+        """Queue a command for a device and wait until it has been sent."""
+        command = PlejdCommand(device, name, kwargs)
+        waiter = self.hass.loop.create_future()
+        command.waiters.append(waiter)
+
+        self.counts["queued"] += 1
+        self.last_used[device] = time.monotonic()
+        key = (device, command.kind)
+        if previous := self._pending.pop(key, None):
+            self.counts["superseded"] += 1
+            command.supersede(previous)
+        self._pending[key] = command
+
+        if not self._cancel_flush:
+            self._cancel_flush = async_call_later(
+                self.hass, self.window.total_seconds(), self._flush
+            )
+        await waiter
+
+    @callback
+    def stop(self) -> None:
+        """Drop all commands which haven't been sent."""
+        if self._cancel_flush:
+            self._cancel_flush()
+            self._cancel_flush = None
+        for command in self._pending.values():
+            for waiter in command.waiters:
+                waiter.cancel()
+        self._pending.clear()
+
+    @callback
+    def _flush(self, *_) -> None:
+        self._cancel_flush = None
+        commands = list(self._pending.values())
+        self._pending.clear()
+        self.hass.async_create_background_task(
+            self._send(commands), "Plejd mesh commands"
+        )
+
+    async def _send(self, commands: list[PlejdCommand]) -> None:
+        err: BaseException | None = None
+        try:
+            async with self._send_lock:
+                await self._send_batch(commands)
+        except asyncio.CancelledError as cancelled:
+            err = cancelled
+            raise
+        except Exception as exc:
+            _LOGGER.exception("Unexpected error when sending commands to mesh")
+            err = exc
+        finally:
+            # Nobody is left waiting for a command, whatever became of it
+            for command in commands:
+                command.finish(err)
+
+    async def _send_batch(self, commands: list[PlejdCommand]) -> None:
+        payloads = []
+        encoded = []
+        for command in commands:
+            try:
+                payloads.extend(await self._encode(command))
+            except Exception as err:
+                command.finish(err)
+                continue
+            encoded.append(command)
+
+        self.counts["batches"] += 1
+        self.counts["payloads"] += len(payloads)
+        try:
+            if payloads:
+                async with self.scheduler.slot(
+                    MeshPriority.INTERACTIVE, cost=len(payloads)
+                ):
+                    written = await self.write(payloads)
+            else:
+                written = True
+        except PlejdMeshBusy as err:
+            self.counts["refused"] += len(encoded)
+            for command in encoded:
+                command.finish(err)
+            return
+
+        if written:
+            self.counts["sent"] += len(encoded)
+        else:
+            self.counts["failed"] += len(encoded)
+        for command in encoded:
+            command.finish()
+
+    async def _encode(self, command: PlejdCommand) -> list[str]:
+        """Return the payloads a command would write to the mesh."""
+        device = command.device
+        if not (mesh := device._mesh):
+            return []
+        recorder = PayloadRecorder()
+        device._mesh = recorder
+        try:
+            await getattr(device, command.name)(**command.kwargs)
+        finally:
+            device._mesh = mesh
+        return recorder.payloads
+
+    async def write(self, payloads: list[str]) -> bool:
+        """Write payloads to the mesh, pacing them by the gateway acknowledgements."""
+        mesh = self.manager.mesh
+        client = mesh._client
+        gateway = mesh._gateway_node
+        if client is None or gateway is None:
+            return False
+        data = [
+            encrypt_decrypt(
+                mesh._crypto_key,
+                gateway.BLEaddress,
+                binascii.a2b_hex(payload.replace(" ", "")),
+            )
+            for payload in payloads
+        ]
+
+        try:
+            characteristic = client.services.get_characteristic(gatt.PLEJD_DATA)
+        except BleakError:
+            characteristic = None
+        unacknowledged = (
+            characteristic is not None
+            and "write-without-response" in characteristic.properties
+        )
+
+        try:
+            async with mesh._ble_lock:
+                for i, payload in enumerate(data, 1):
+                    response = (
+                        not unacknowledged or i % COMMAND_BURST == 0 or i == len(data)
+                    )
+                    await client.write_gatt_char(
+                        characteristic or gatt.PLEJD_DATA, payload, response=response
+                    )
+        except (BleakError, TimeoutError) as err:
+            _LOGGER.warning("Writing to plejd mesh failed: %s", err)
+            return False
+        return True
+
+    def diagnostics(self) -> dict:
+        """Return the command statistics for diagnostics."""
+        return {
+            "window": self.window.total_seconds(),
+            "pending": len(self._pending),
+            **self.counts,
+        }
@@ -0,0 +1,237 @@
+"""Plejd mesh connection supervisor."""
+
+from collections import Counter
+from datetime import datetime, timedelta
+from enum import StrEnum
+import logging
+import random
+import time
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from pyplejd import PlejdManager
+
+from .plejd_scheduler import MeshPriority, PlejdMeshBusy, PlejdMeshScheduler
+from .plejd_trace import TRACE_PING, PlejdTrace
+
+_LOGGER = logging.getLogger(__name__)
+
+BACKOFF_MIN = timedelta(seconds=5)
+BACKOFF_MAX = timedelta(minutes=5)
+
+# How often to check whether the connection needs a keep-alive ping
+KEEPALIVE_CHECK_INTERVAL = timedelta(seconds=30)
+
+
+class ConnectionState(StrEnum):
+    """State of the connection to the mesh."""
+
+    DISCONNECTED = "disconnected"
+    CONNECTING = "connecting"
+    CONNECTED = "connected"
+    BACKING_OFF = "backing_off"
+
+
+class PlejdConnectionSupervisor:
+    """Connects to the mesh and keeps the connection alive.
+
+    Only one connection attempt or keep-alive ping is made at a time.
+    Requests made while one is in flight, or while waiting to retry after
+    a failure, are merged into that attempt. Failed attempts are retried
+    with jittered exponential backoff, unless a request brought news which
+    may let the next attempt succeed (such as a newly discovered gateway):
+    then the backoff is cut short and the attempt is made right away.
+
+    An established connection is pinged when it has been idle for
+    keepalive_idle. In adaptive mode, traffic received from the mesh counts
+    as proof that the connection is alive, so a busy mesh is not pinged.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        manager: PlejdManager,
+        scheduler: PlejdMeshScheduler,
+        trace: PlejdTrace,
+    ) -> None:
+        """Initialize connection supervisor."""
+        self.hass = hass
+        self.manager = manager
+        self.scheduler = scheduler
+        self.trace = trace
+
+        self.state = ConnectionState.DISCONNECTED
+        self.state_changed: datetime = dt_util.utcnow()
+        self.transitions: Counter[str] = Counter()
+        self.attempts = 0
+        self.merged_requests = 0
+        self.backoffs_cut = 0
+        self.failures = 0
+
+        self.keepalive_idle: timedelta = manager.ping_interval
+        self.adaptive_keepalive = True
+        self.keepalive_pings = 0
+        self.keepalive_skipped = 0
+        self.last_traffic: float | None = None
+        self._last_keepalive = 0.0
+
+        self._running = False
+        self._attempt_in_flight = False
+        self._retry_now = False
+        self._cancel_retry: CALLBACK_TYPE | None = None
+
+    def start(self) -> None:
+        """Start connecting to the mesh."""
+        self._running = True
+        self.request()
+
+    def stop(self) -> None:
+        """Stop connecting to the mesh."""
+        self._running = False
+        if self._cancel_retry:
+            self._cancel_retry()
+            self._cancel_retry = None
+
+    @callback
+    def request(self, *_, immediate: bool = False) -> None:
+        """Request a connection attempt, or a keep-alive ping if connected.
+
+        With immediate, the request brings something new to try, so a pending
+        retry is made now rather than after the backoff.
+        """
+        if not self._running:
+            return
+        if self._attempt_in_flight:
+            self.merged_requests += 1
+            self._retry_now |= immediate
+            return
+        if self._cancel_retry:
+            if not immediate:
+                self.merged_requests += 1
+                return
+            self._cancel_retry()
+            self.backoffs_cut += 1
+        self._start_attempt()
+
+    @callback
+    def connection_lost(self) -> None:
+        """When the connection to the mesh is lost."""
+        if self.state == ConnectionState.CONNECTED:
+            self._set_state(ConnectionState.DISCONNECTED)
+            self.request()
+
+    @callback
+    def traffic_received(self) -> None:
+        """When a notification is received from the mesh."""
+        self.last_traffic = time.monotonic()
+
+    @callback
+    def keep_alive(self, *_) -> None:
+        """Ping the mesh if the connection has been idle for too long."""
+        if self.state != ConnectionState.CONNECTED:
+            self.request()
+            return
+
+        now = time.monotonic()
+        idle = self.keepalive_idle.total_seconds()
+        if now - self._last_keepalive < idle:
+            return
+        if (
+            self.adaptive_keepalive
+            and self.last_traffic
+            and now - self.last_traffic < idle
+        ):
+            self.keepalive_skipped += 1
+            self._last_keepalive = now
+            return
+        self.keepalive_pings += 1
+        self.request()
+
+    def _set_state(self, state: ConnectionState) -> None:
+        if state == self.state:
+            return
+        _LOGGER.debug("Mesh connection %s -> %s", self.state, state)
+        self.transitions[f"{self.state}->{state}"] += 1
+        self.state = state
+        self.state_changed = dt_util.utcnow()
+
+    @callback
+    def _start_attempt(self, *_) -> None:
+        self._cancel_retry = None
+        self._attempt_in_flight = True
+        self._retry_now = False
+        if self.state != ConnectionState.CONNECTED:
+            self._set_state(ConnectionState.CONNECTING)
+        self.hass.async_create_background_task(self._attempt(), "Plejd mesh connection")
+
+    async def _attempt(self) -> None:
+        self.attempts += 1
+        started = time.monotonic()
+        try:
+            async with self.scheduler.slot(MeshPriority.HOUSEKEEPING, cost=2):
+                connected = await self.manager.ping()
+        except PlejdMeshBusy as err:
+            _LOGGER.debug("Skipping mesh connection attempt: %s", err)
+            connected = self.state == ConnectionState.CONNECTED
+        except Exception:
+            _LOGGER.exception("Unexpected error when connecting to mesh")
+            connected = False
+        finally:
+            self._attempt_in_flight = False
+
+        self.trace.record(
+            TRACE_PING,
+            connected=connected,
+            duration=round(time.monotonic() - started, 3),
+        )
+        if not self._running:
+            return
+        if connected:
+            self.failures = 0
+            self._last_keepalive = time.monotonic()
+            self._set_state(ConnectionState.CONNECTED)
+            return
+
+        self.failures += 1
+        if self._retry_now:
+            # Something new came up during the attempt, so try again with it
+            self.backoffs_cut += 1
+            self._start_attempt()
+            return
+        delay = self._backoff()
+        _LOGGER.debug("Connecting to mesh failed. Retrying in %.0f s", delay)
+        self._set_state(ConnectionState.BACKING_OFF)
+        self._cancel_retry = async_call_later(self.hass, delay, self._start_attempt)
+
+    def _backoff(self) -> float:
+        """Return a jittered delay which doubles with each consecutive failure."""
+        delay = min(
+            BACKOFF_MIN.total_seconds() * 2 ** (self.failures - 1),
+            BACKOFF_MAX.total_seconds(),
+        )
+        return random.uniform(delay / 2, delay)
+
+    def diagnostics(self) -> dict:
+        """Return the connection state for diagnostics."""
+        return {
+            "state": self.state,
+            "state_changed": self.state_changed.isoformat(),
+            "attempts": self.attempts,
+            "merged_requests": self.merged_requests,
+            "backoffs_cut": self.backoffs_cut,
+            "consecutive_failures": self.failures,
+            "transitions": dict(self.transitions),
+            "keepalive": {
+                "adaptive": self.adaptive_keepalive,
+                "idle": self.keepalive_idle.total_seconds(),
+                "pings": self.keepalive_pings,
+                "skipped": self.keepalive_skipped,
+                "seconds_since_traffic": (
+                    round(time.monotonic() - self.last_traffic, 1)
+                    if self.last_traffic
+                    else None
+                ),
+            },
+        }
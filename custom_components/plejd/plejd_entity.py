@@ -1,13 +1,298 @@
 """Plejd entity helpers."""
 
-from homeassistant.core import callback, HomeAssistant
+from collections import deque
+from datetime import timedelta
+from functools import partial
+import logging
+import statistics
+import time
+
+from homeassistant.core import CALLBACK_TYPE, callback, HomeAssistant
 from homeassistant.helpers.entity import Entity
-from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
 from homeassistant.const import EntityCategory
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, MANUFACTURER
+from .const import (
+    DOMAIN,
+    MANUFACTURER,
+    SIGNAL_DEVICE_CHANGED,
+    SIGNAL_DEVICE_REMOVED,
+)
+from .plejd_commands import PlejdCommandQueue
 from .plejd_site import dt
 
+_LOGGER = logging.getLogger(__name__)
+
+# Number of batch latencies kept for diagnostics
+BATCH_LATENCY_HISTORY = 50
+
+# Number of confirmation latencies kept per entity for diagnostics
+OPTIMISTIC_LATENCY_HISTORY = 20
+
+
+class PlejdWriteBatch:
+    """State writes of a group of devices which are held to be written together."""
+
+    def __init__(self, key, devices: set[dt.PlejdDevice]) -> None:
+        """Initialize write batch."""
+        self.key = key
+        self.devices = devices
+        self.reported: set[dt.PlejdDevice] = set()
+        self.pending: dict["PlejdDeviceBaseEntity", None] = {}
+        self.started = time.monotonic()
+        self.cancel_timeout: CALLBACK_TYPE | None = None
+
+
+class PlejdStateWriter:
+    """Write pipeline for the states of Plejd entities.
+
+    The first write of an entity is made at once, so that e.g. the echo of
+    a command shows without delay. Further writes requested within a short
+    window after it are merged into one at the end of the window, and writes
+    which don't change what the entity shows are skipped.
+
+    A batch can be opened for a group of devices which are expected to
+    report new states, e.g. the members of an activated scene. Their writes
+    are then held until all of them have reported, or the batch times out,
+    and written together.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize state writer."""
+        self.hass = hass
+        self.window = timedelta(0)
+        self.written = 0
+        self.skipped = 0
+        self.merged = 0
+        self.batch_counts: dict[str, int] = dict.fromkeys(
+            ("opened", "complete", "timed_out", "repeated", "held"), 0
+        )
+        self.batch_latency: list[float] = []
+        self._pending: dict["PlejdDeviceBaseEntity", None] = {}
+        self._cancel_flush: CALLBACK_TYPE | None = None
+        self._batches: dict = {}
+        self._batch_by_device: dict[dt.PlejdDevice, PlejdWriteBatch] = {}
+
+    @callback
+    def write(self, entity: "PlejdDeviceBaseEntity") -> None:
+        """Request a state write for an entity."""
+        if entity.entity_category is None and (
+            batch := self._batch_by_device.get(entity.device)
+        ):
+            self.batch_counts["held"] += 1
+            batch.pending[entity] = None
+            batch.reported.add(entity.device)
+            if len(batch.reported) == len(batch.devices):
+                self._flush_batch(batch, True)
+            return
+        if entity in self._pending:
+            self.merged += 1
+            return
+        if time.monotonic() - entity.written_at >= self.window.total_seconds():
+            self._write(entity)
+            return
+        self._pending[entity] = None
+        if not self._cancel_flush:
+            self._cancel_flush = async_call_later(
+                self.hass, self.window.total_seconds(), self._flush
+            )
+
+    @callback
+    def begin_batch(
+        self, key, devices: set[dt.PlejdDevice], timeout: timedelta
+    ) -> bool:
+        """Hold the writes of devices until all have reported or timeout passes.
+
+        Returns False if a batch with the same key is already open.
+        """
+        if key in self._batches:
+            self.batch_counts["repeated"] += 1
+            return False
+        devices = {device for device in devices if device not in self._batch_by_device}
+        if not devices:
+            return True
+
+        self.batch_counts["opened"] += 1
+        batch = PlejdWriteBatch(key, devices)
+        self._batches[key] = batch
+        for device in devices:
+            self._batch_by_device[device] = batch
+        batch.cancel_timeout = async_call_later(
+            self.hass,
+            timeout.total_seconds(),
+            partial(self._flush_batch, batch, False),
+        )
+        return True
+
+    @callback
+    def discard(self, entity: "PlejdDeviceBaseEntity") -> None:
+        """Drop a pending write for an entity."""
+        self._pending.pop(entity, None)
+        if batch := self._batch_by_device.get(entity.device):
+            batch.pending.pop(entity, None)
+
+    @callback
+    def stop(self) -> None:
+        """Drop all pending writes."""
+        if self._cancel_flush:
+            self._cancel_flush()
+            self._cancel_flush = None
+        self._pending.clear()
+        for batch in self._batches.values():
+            if batch.cancel_timeout:
+                batch.cancel_timeout()
+        self._batches.clear()
+        self._batch_by_device.clear()
+
+    @callback
+    def _flush(self, *_) -> None:
+        self._cancel_flush = None
+        pending, self._pending = self._pending, {}
+        for entity in pending:
+            self._write(entity)
+
+    @callback
+    def _flush_batch(self, batch: PlejdWriteBatch, complete: bool, *_) -> None:
+        if batch.cancel_timeout and complete:
+            batch.cancel_timeout()
+        batch.cancel_timeout = None
+        del self._batches[batch.key]
+        for device in batch.devices:
+            del self._batch_by_device[device]
+
+        for entity in batch.pending:
+            self._write(entity)
+
+        if complete:
+            self.batch_counts["complete"] += 1
+            self.batch_latency.append(time.monotonic() - batch.started)
+            del self.batch_latency[:-BATCH_LATENCY_HISTORY]
+        else:
+            self.batch_counts["timed_out"] += 1
+
+    def _write(self, entity: "PlejdDeviceBaseEntity") -> None:
+        shown = entity.shown_state()
+        if shown == entity.written_state:
+            self.skipped += 1
+            return
+        self.written += 1
+        entity.written_state = shown
+        entity.written_at = time.monotonic()
+        entity.async_write_ha_state()
+
+    def diagnostics(self) -> dict:
+        """Return the write statistics for diagnostics."""
+        return {
+            "window": self.window.total_seconds(),
+            "written": self.written,
+            "skipped": self.skipped,
+            "merged": self.merged,
+            "pending": len(self._pending),
+            "batches": {
+                **self.batch_counts,
+                "open": len(self._batches),
+                "latency_ms": (
+                    {
+                        "last": round(self.batch_latency[-1] * 1000, 1),
+                        "mean": round(statistics.mean(self.batch_latency) * 1000, 1),
+                        "max": round(max(self.batch_latency) * 1000, 1),
+                    }
+                    if self.batch_latency
+                    else None
+                ),
+            },
+        }
+
+
+class PlejdOptimisticStats:
+    """Confirmation statistics of the optimistic states of an entity."""
+
+    __slots__ = ("confirmed", "mismatched", "latency", "last_mismatch")
+
+    def __init__(self) -> None:
+        self.confirmed = 0
+        self.mismatched = 0
+        self.latency: deque[float] = deque(maxlen=OPTIMISTIC_LATENCY_HISTORY)
+        self.last_mismatch: dict | None = None
+
+
+class PlejdOptimisticState:
+    """Settings and statistics of optimistic entity states.
+
+    When enabled, an entity shows the state a command is expected to lead
+    to as soon as the command has been sent. The expectation is confirmed
+    when the device reports the same state, and rolled back if it hasn't
+    done so before the deadline.
+    """
+
+    def __init__(self) -> None:
+        """Initialize optimistic state settings."""
+        self.enabled = False
+        self.deadline = timedelta(seconds=3)
+        self.stats: dict[str, PlejdOptimisticStats] = {}
+
+    def confirmed(self, entity_id: str, latency: float) -> None:
+        """Record that a device reported the expected state."""
+        stats = self.stats.setdefault(entity_id, PlejdOptimisticStats())
+        stats.confirmed += 1
+        stats.latency.append(latency)
+
+    def mismatched(self, entity_id: str, expected: dict, reported: dict) -> None:
+        """Record that a device didn't report the expected state in time."""
+        _LOGGER.warning(
+            "%s did not report the expected state %s within %.1f s. Reported: %s",
+            entity_id,
+            expected,
+            self.deadline.total_seconds(),
+            {key: reported.get(key) for key in expected},
+        )
+        stats = self.stats.setdefault(entity_id, PlejdOptimisticStats())
+        stats.mismatched += 1
+        stats.last_mismatch = {
+            "time": dt_util.utcnow().isoformat(),
+            "expected": expected,
+            "reported": {key: reported.get(key) for key in expected},
+        }
+
+    def diagnostics(self) -> dict:
+        """Return the optimistic state statistics for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "deadline": self.deadline.total_seconds(),
+            "entities": {
+                entity_id: {
+                    "confirmed": stats.confirmed,
+                    "mismatched": stats.mismatched,
+                    "latency_ms": (
+                        {
+                            "mean": round(statistics.mean(stats.latency) * 1000, 1),
+                            "max": round(max(stats.latency) * 1000, 1),
+                        }
+                        if stats.latency
+                        else None
+                    ),
+                    "last_mismatch": stats.last_mismatch,
+                }
+                for entity_id, stats in self.stats.items()
+            },
+        }
+
+
+def _matches(expected: dict, reported: dict) -> bool:
+    """Return whether a reported state has all the expected values."""
+    for key, value in expected.items():
+        actual = reported.get(key)
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            if actual != value:
+                return False
+        # Levels may be reported with a slightly different rounding
+        elif not isinstance(actual, (int, float)) or abs(actual - value) > 1:
+            return False
+    return True
+
 
 class PlejdDeviceBaseEntity(Entity):
     """Representation of a Plejd device."""
@@ -15,21 +300,128 @@ class PlejdDeviceBaseEntity(Entity):
     _attr_has_entity_name = True
     _attr_name = None
 
+    # Set by the site when the entity is created
+    state_writer: PlejdStateWriter | None = None
+    command_queue: PlejdCommandQueue | None = None
+    optimistic: PlejdOptimisticState | None = None
+    # Entities which fire events on updates must write every update at once
+    _coalesce_state_writes = True
+    # Entities which write their own state in _handle_update clear this
+    _write_on_update = True
+
     def __init__(self, device: dt.PlejdDevice):
         """Set up entity."""
         super().__init__()
         self.device = device
         self.listener = None
         self._data = {}
+        self._reported = {}
+        self._expected: dict | None = None
+        self._expected_at = 0.0
+        self._cancel_expected: CALLBACK_TYPE | None = None
+        self.written_state = None
+        self.written_at = 0.0
+        self._update_device_attributes()
 
     @property
-    def device_info(self):
+    def available(self) -> bool:
+        """Returns whether the switch is avaiable."""
+        return self._data.get("available", False)
+
+    def shown_state(self) -> tuple:
+        """Return what the entity shows, to tell if a write would change it."""
+        return (
+            self.available,
+            self.state,
+            self.state_attributes,
+            self.extra_state_attributes,
+        )
+
+    @callback
+    def _async_write_state(self) -> None:
+        """Write the entity state through the state writer."""
+        if self.state_writer and self._coalesce_state_writes:
+            self.state_writer.write(self)
+        else:
+            self.async_write_ha_state()
+
+    async def _async_send(
+        self, command: str, expected: dict | None = None, **kwargs
+    ) -> None:
+        """Send a command to the device through the command queue.
+
+        In optimistic mode the expected state is shown once the command
+        has been sent, until the device reports it or the deadline passes.
+        """
+        if expected is not None:
+            expected = self._expect(expected)
+        try:
+            if self.command_queue:
+                await self.command_queue.send(self.device, command, **kwargs)
+            else:
+                await getattr(self.device, command)(**kwargs)
+        except BaseException:
+            if expected is not None and self._expected is expected:
+                self._clear_expected()
+            raise
+
+        if expected is not None and self._expected is expected:
+            self._data = {**self._reported, **expected}
+            self._cancel_expected = async_call_later(
+                self.hass,
+                self.optimistic.deadline.total_seconds(),
+                self._async_expected_timeout,
+            )
+            self._async_write_state()
+
+    def _expect(self, expected: dict) -> dict | None:
+        """Start waiting for the device to report an expected state."""
+        if not (self.optimistic and self.optimistic.enabled):
+            return None
+        self._clear_expected()
+        if _matches(expected, self._reported):
+            return None
+        self._expected = expected
+        self._expected_at = time.monotonic()
+        return expected
+
+    def _clear_expected(self) -> None:
+        if self._cancel_expected:
+            self._cancel_expected()
+            self._cancel_expected = None
+        self._expected = None
+
+    def _reconcile(self, data: dict) -> dict:
+        """Return the state to show for a reported state."""
+        if self._expected is None:
+            return data
+        if _matches(self._expected, data):
+            self.optimistic.confirmed(
+                self.entity_id, time.monotonic() - self._expected_at
+            )
+            self._clear_expected()
+            return data
+        if self._cancel_expected is None:
+            # The command hasn't been sent yet
+            return data
+        return {**data, **self._expected}
+
+    @callback
+    def _async_expected_timeout(self, *_) -> None:
+        """Roll back to the reported state when the expected one didn't come."""
+        self._cancel_expected = None
+        self.optimistic.mismatched(self.entity_id, self._expected, self._reported)
+        self._expected = None
+        self._data = self._reported
+        self._async_write_state()
+
+    def _device_info(self) -> dict | None:
         """Return a device description for device registry."""
         info = {
             "identifiers": {(DOMAIN, self.device.device_identifier)},
             "name": self.device.name,
             "manufacturer": MANUFACTURER,
-            "model": f"{self.device.hardware}",
+            "model": self.device.hardware,
             "suggested_area": self.device.room,
             "sw_version": str(self.device.firmware),
         }
@@ -37,40 +429,86 @@ class PlejdDeviceBaseEntity(Entity):
             info["via_device"] = (DOMAIN, self.device.parent_identifier)
         return info
 
-    @property
-    def unique_id(self):
-        """Return unique identifier for the entity."""
-        return ":".join(self.device.identifier)
+    def _update_device_attributes(self) -> None:
+        """Read static entity attributes from the device definition.
 
-    @property
-    def entity_registry_visible_default(self):
-        """Return if the device should be visible by default"""
-        return not self.device.hidden
-
-    @property
-    def available(self) -> bool:
-        """Returns whether the switch is avaiable."""
-        return self._data.get("available", False)
+        Called when the entity is created and when the device definition
+        changes, so that state writes only have to read the device state.
+        """
+        self._attr_unique_id = ":".join(self.device.identifier)
+        self._attr_device_info = self._device_info()
+        self._attr_entity_registry_visible_default = not self.device.hidden
 
     @callback
     def _handle_update(self, data) -> None:
         """When device state is updated from Plejd"""
         pass
 
-    async def async_added_to_hass(self) -> None:
-        """When entity is added to hass."""
+    def _subscribe(self):
+        """Subscribe to state updates from the device."""
 
         def _listener(data):
-            self._data = data
+            self._reported = data
+            self._data = self._reconcile(data)
             self._handle_update(data)
-            self.async_write_ha_state()
+            if self._write_on_update:
+                self._async_write_state()
+
+        remover = self.device.subscribe(_listener)
+        # New listeners aren't told the current state, e.g. the availability
+        # set while the entity was waiting to be added
+        if state := self.device._state:
+            self._reported = state
+            self._data = self._reconcile(state)
+        return remover
+
+    @callback
+    def _async_device_changed(self, device: dt.PlejdDevice) -> None:
+        """When the device definition is changed in the Plejd cloud."""
+        if self.listener:
+            self.listener()
+        self.device = device
+        self._clear_expected()
+        self._update_device_attributes()
+        self.listener = self._subscribe()
+        self.written_state = None
+        self.async_write_ha_state()
+
+    @callback
+    def _async_device_removed(self) -> None:
+        """When the device is removed from the Plejd site."""
+        if self.registry_entry:
+            er.async_get(self.hass).async_remove(self.entity_id)
+        else:
+            self.hass.async_create_task(self.async_remove(force_remove=True))
+
+    async def async_added_to_hass(self) -> None:
+        """When entity is added to hass."""
+        self.listener = self._subscribe()
 
-        self.listener = self.device.subscribe(_listener)
+        key = ":".join(self.device.identifier)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DEVICE_CHANGED.format(key),
+                self._async_device_changed,
+            )
+        )
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_DEVICE_REMOVED.format(key),
+                self._async_device_removed,
+            )
+        )
 
     async def async_will_remove_from_hass(self) -> None:
         """When entity will be removed from hass."""
         if self.listener:
             self.listener()
+        self._clear_expected()
+        if self.state_writer:
+            self.state_writer.discard(self)
         return await super().async_will_remove_from_hass()
 
 
@@ -81,18 +519,17 @@ class PlejdDeviceDiagnosticEntity(PlejdDeviceBaseEntity):
     _attr_has_entity_name = False
     _id_suffix = "diagnostic"
 
-    @property
-    def device_info(self):
+    def _device_info(self) -> dict | None:
         """Return a device description for device registry."""
-        info = super().device_info
+        info = super()._device_info()
         info["connections"] = {(dr.CONNECTION_BLUETOOTH, self.device.ble_mac)}
 
         return info
 
-    @property
-    def unique_id(self):
-        """Return unique identifier for the entity."""
-        return ":".join(self.device.identifier) + self._id_suffix
+    def _update_device_attributes(self) -> None:
+        """Read static entity attributes from the device definition."""
+        super()._update_device_attributes()
+        self._attr_unique_id += self._id_suffix
 
     @property
     def available(self):
@@ -103,14 +540,14 @@ class PlejdDeviceDiagnosticEntity(PlejdDeviceBaseEntity):
         """When device state is updated from Plejd"""
         pass
 
-    async def async_added_to_hass(self) -> None:
-        """When entity is added to hass."""
+    def _subscribe(self):
+        """Subscribe to updates from the device hardware."""
 
         def _listener():
             self._handle_update()
-            self.async_write_ha_state()
+            self._async_write_state()
 
-        self.listener = self.device.hw.subscribe(_listener)
+        return self.device.hw.subscribe(_listener)
 
 
 @callback
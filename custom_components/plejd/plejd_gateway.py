@@ -0,0 +1,127 @@
+"""Ranking of Plejd devices as mesh gateway candidates."""
+
+from collections import deque
+from datetime import timedelta
+import statistics
+import time
+
+# Number and maximum age of RSSI readings kept for each device and scanner
+RSSI_WINDOW_SIZE = 20
+RSSI_WINDOW_AGE = timedelta(minutes=10)
+
+# Variance assumed for a link before there are enough readings to measure it
+RSSI_DEFAULT_VARIANCE = 25.0
+RSSI_MIN_SAMPLES = 3
+
+# How much an unstable link is penalized, in dB per dB of standard deviation
+STABILITY_WEIGHT = 1.0
+
+
+class RSSIHistory:
+    """Rolling window of RSSI readings of a device from one scanner."""
+
+    __slots__ = ("readings",)
+
+    def __init__(self) -> None:
+        self.readings: deque[tuple[float, int]] = deque(maxlen=RSSI_WINDOW_SIZE)
+
+    def add(self, rssi: int, now: float) -> None:
+        self.readings.append((now, rssi))
+
+    def prune(self, now: float) -> None:
+        """Drop readings which are too old."""
+        oldest = now - RSSI_WINDOW_AGE.total_seconds()
+        while self.readings and self.readings[0][0] < oldest:
+            self.readings.popleft()
+
+    @property
+    def median(self) -> float:
+        return statistics.median(rssi for _, rssi in self.readings)
+
+    @property
+    def variance(self) -> float:
+        if len(self.readings) < RSSI_MIN_SAMPLES:
+            return RSSI_DEFAULT_VARIANCE
+        return statistics.pvariance([rssi for _, rssi in self.readings])
+
+    @property
+    def score(self) -> float:
+        """Link quality, the median RSSI lowered by its spread."""
+        return self.median - STABILITY_WEIGHT * self.variance**0.5
+
+
+class PlejdGatewayRanking:
+    """Keeps RSSI history per device and scanner and ranks gateway candidates."""
+
+    def __init__(self) -> None:
+        self.history: dict[str, dict[str, RSSIHistory]] = {}
+
+    def add(self, address: str, source: str, rssi: int) -> float:
+        """Add a reading of a device from a scanner and return its new score."""
+        now = time.monotonic()
+        sources = self.history.setdefault(address, {})
+        sources.setdefault(source, RSSIHistory()).add(rssi, now)
+        return self.score(address, now)
+
+    def score(self, address: str, now: float | None = None) -> float | None:
+        """Return the score of the best link to a device."""
+        sources = self._recent(address, now)
+        if not sources:
+            return None
+        return max(history.score for history in sources.values())
+
+    def best_source(self, address: str, now: float | None = None) -> str | None:
+        """Return the scanner with the best link to a device."""
+        sources = self._recent(address, now)
+        if not sources:
+            return None
+        return max(sources, key=lambda source: sources[source].score)
+
+    def _recent(self, address: str, now: float | None) -> dict[str, RSSIHistory]:
+        """Drop old readings of a device and return the scanners left."""
+        now = now or time.monotonic()
+        sources = self.history.get(address, {})
+        for source, history in list(sources.items()):
+            history.prune(now)
+            if not history.readings:
+                del sources[source]
+        return sources
+
+    def latest(self, address: str) -> int | None:
+        """Return the most recent RSSI reading of a device from any scanner."""
+        reading = self.latest_reading(address)
+        return reading[1] if reading else None
+
+    def latest_reading(self, address: str) -> tuple[str, int] | None:
+        """Return the scanner and RSSI of the most recent reading of a device."""
+        readings = [
+            (*history.readings[-1], source)
+            for source, history in self.history.get(address, {}).items()
+            if history.readings
+        ]
+        if not readings:
+            return None
+        _, rssi, source = max(readings)
+        return source, rssi
+
+    def ranking(self) -> list[tuple[str, float]]:
+        """Return all devices with recent readings, best candidate first."""
+        now = time.monotonic()
+        scores = [(address, self.score(address, now)) for address in self.history]
+        return sorted(
+            ((address, score) for address, score in scores if score is not None),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+    def links(self, address: str) -> dict:
+        """Return the RSSI statistics of a device for each scanner."""
+        return {
+            source: {
+                "samples": len(history.readings),
+                "median": history.median,
+                "variance": round(history.variance, 1),
+                "score": round(history.score, 1),
+            }
+            for source, history in self.history.get(address, {}).items()
+        }
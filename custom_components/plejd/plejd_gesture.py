@@ -0,0 +1,140 @@
+"""Gesture recognition for Plejd buttons."""
+
+from collections import Counter
+from datetime import timedelta
+import time
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+GESTURE_PRESS = "press"
+GESTURE_RELEASE = "release"
+GESTURE_SINGLE = "single"
+GESTURE_DOUBLE = "double"
+GESTURE_LONG_PRESS = "long_press"
+
+GESTURES = [
+    GESTURE_PRESS,
+    GESTURE_RELEASE,
+    GESTURE_SINGLE,
+    GESTURE_DOUBLE,
+    GESTURE_LONG_PRESS,
+]
+
+# Repeats of the same action this close together are treated as one
+DUPLICATE_WINDOW = timedelta(milliseconds=50)
+
+# Raw actions accepted from a button, as a burst and a sustained rate
+STORM_BURST = 10
+STORM_RATE = 5.0
+
+
+class PlejdGestures:
+    """Timing settings and statistics shared by the gesture engines of a site."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize gesture settings."""
+        self.hass = hass
+        self.double_click = timedelta(milliseconds=400)
+        self.long_press = timedelta(milliseconds=800)
+        self.counts: Counter[str] = Counter()
+
+    def engine(self, trigger: Callable[[str], None]) -> "PlejdGestureEngine":
+        """Create a gesture engine for a button."""
+        return PlejdGestureEngine(self, trigger)
+
+    def diagnostics(self) -> dict:
+        """Return the gesture settings and statistics for diagnostics."""
+        return {
+            "double_click": self.double_click.total_seconds(),
+            "long_press": self.long_press.total_seconds(),
+            "counts": dict(self.counts),
+        }
+
+
+class PlejdGestureEngine:
+    """Turns the raw press and release actions of a button into gestures.
+
+    Plejd buttons only report a release after being held, so a click is a
+    lone press. A press starts a gesture, which becomes a double click if
+    the button is pressed again within the double click window, and a
+    single click once the window has passed without one. A release after
+    the button has been held for at least the long press time is a long
+    press, which then follows the single click of its press.
+    The raw presses and releases are passed on as well.
+    """
+
+    def __init__(self, gestures: PlejdGestures, trigger: Callable[[str], None]) -> None:
+        """Initialize gesture engine."""
+        self.gestures = gestures
+        self.trigger = trigger
+
+        self._tokens = float(STORM_BURST)
+        self._last_action: tuple[str, float] | None = None
+        self._pressed_at: float | None = None
+        self._cancel_window: CALLBACK_TYPE | None = None
+
+    @callback
+    def handle(self, action: str) -> None:
+        """Handle a raw action from the button."""
+        now = time.monotonic()
+        if not self._accept(action, now):
+            return
+
+        if action == GESTURE_PRESS:
+            self._emit(GESTURE_PRESS)
+            if self._cancel_window:
+                self._reset()
+                self._emit(GESTURE_DOUBLE)
+                return
+            self._pressed_at = now
+            self._cancel_window = async_call_later(
+                self.gestures.hass,
+                self.gestures.double_click.total_seconds(),
+                self._window_closed,
+            )
+        elif action == GESTURE_RELEASE:
+            if self._pressed_at is not None:
+                held = now - self._pressed_at
+                self._pressed_at = None
+                if held >= self.gestures.long_press.total_seconds():
+                    self._emit(GESTURE_LONG_PRESS)
+            self._emit(GESTURE_RELEASE)
+
+    @callback
+    def stop(self) -> None:
+        """Drop any gesture in progress."""
+        self._reset()
+
+    def _accept(self, action: str, now: float) -> bool:
+        """Drop duplicated actions and limit the rate during event storms."""
+        last, self._last_action = self._last_action, (action, now)
+        if last:
+            elapsed = now - last[1]
+            self._tokens = min(STORM_BURST, self._tokens + elapsed * STORM_RATE)
+            if last[0] == action and elapsed < DUPLICATE_WINDOW.total_seconds():
+                self.gestures.counts["suppressed_duplicate"] += 1
+                return False
+
+        if self._tokens < 1:
+            self.gestures.counts["suppressed_storm"] += 1
+            return False
+        self._tokens -= 1
+        return True
+
+    @callback
+    def _window_closed(self, *_) -> None:
+        # The press is kept, so that a release can still tell a long press
+        self._cancel_window = None
+        self._emit(GESTURE_SINGLE)
+
+    def _reset(self) -> None:
+        if self._cancel_window:
+            self._cancel_window()
+            self._cancel_window = None
+        self._pressed_at = None
+
+    def _emit(self, gesture: str) -> None:
+        self.gestures.counts[gesture] += 1
+        self.trigger(gesture)
@@ -0,0 +1,97 @@
+"""Motion model of Plejd covers."""
+
+# Runs shorter than this share of the full travel are too noisy to learn from
+MIN_LEARN_TRAVEL = 10
+
+# Weight of a new observation in the learned travel time
+LEARN_RATE = 0.3
+
+
+class PlejdCoverMotion:
+    """Learns how long a cover takes to travel, and estimates its position.
+
+    The covers only report their position when they start and stop, so the
+    time it takes to travel the full range in each direction is learned
+    from runs which start and stop at known positions. While the cover is
+    moving, the position is then estimated from where and when it started.
+    """
+
+    def __init__(self) -> None:
+        """Initialize cover motion model."""
+        # Seconds to travel the full range, by whether the cover is opening
+        self.travel_time: dict[bool, float | None] = {True: None, False: None}
+        self.position: float | None = None
+        self.moving = False
+        self.opening = False
+        self.target: float | None = None
+
+        self._anchor: tuple[float, float] | None = None
+        self._run: tuple[float, float] | None = None
+
+    def update(
+        self, moving: bool, opening: bool, position: float | None, now: float
+    ) -> None:
+        """Update the model from a state reported by the cover."""
+        if moving and (not self.moving or opening != self.opening):
+            # A new run, or a change of direction
+            start = position if position is not None else self.estimate(now)
+            self._run = (start, now) if start is not None else None
+            self._anchor = self._run
+        elif moving and position is not None:
+            self._anchor = (position, now)
+        elif not moving and self.moving:
+            self._learn(position, now)
+            self._run = None
+            self._anchor = None
+            self.target = None
+
+        self.moving = moving
+        self.opening = opening
+        if position is not None:
+            self.position = position
+
+    def _learn(self, position: float | None, now: float) -> None:
+        if self._run is None or position is None:
+            return
+        start, started = self._run
+        travelled = abs(position - start)
+        if travelled < MIN_LEARN_TRAVEL:
+            return
+        observed = (now - started) * 100 / travelled
+        if (learned := self.travel_time[self.opening]) is None:
+            self.travel_time[self.opening] = observed
+        else:
+            self.travel_time[self.opening] = learned + LEARN_RATE * (observed - learned)
+
+    def _travel_time(self) -> float | None:
+        """Return the travel time in the current direction.
+
+        Until it has been learned, the other direction is a fair guess.
+        """
+        return self.travel_time[self.opening] or self.travel_time[not self.opening]
+
+    def _limit(self, position: float) -> float:
+        """Return the position a cover moving from position will stop at."""
+        if self.target is not None and (self.target > position) == self.opening:
+            return self.target
+        return 100 if self.opening else 0
+
+    def estimate(self, now: float) -> float | None:
+        """Return the estimated position of the cover."""
+        travel_time = self._travel_time()
+        if not self.moving or self._anchor is None or not travel_time:
+            return self.position
+        position, since = self._anchor
+        travelled = (now - since) * 100 / travel_time
+        limit = self._limit(position)
+        if self.opening:
+            return min(position + travelled, limit, 100)
+        return max(position - travelled, limit, 0)
+
+    def predicted_stop(self) -> float | None:
+        """Return the monotonic time the cover is expected to stop at."""
+        travel_time = self._travel_time()
+        if not self.moving or self._anchor is None or not travel_time:
+            return None
+        position, since = self._anchor
+        return since + abs(self._limit(position) - position) * travel_time / 100
@@ -0,0 +1,190 @@
+"""Plejd mesh state resynchronisation."""
+
+import asyncio
+from collections import deque
+from datetime import timedelta
+import logging
+import time
+
+from bleak import BleakError
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from pyplejd import PlejdManager, DeviceTypes as dt
+
+from .plejd_commands import PlejdCommandQueue
+from .plejd_scheduler import MeshPriority, PlejdMeshBusy, PlejdMeshScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Devices which haven't reported this long after the requests are marked unavailable
+RESYNC_DEADLINE = timedelta(seconds=10)
+
+# Number of state requests written to the mesh in each turn
+RESYNC_CHUNK = 8
+
+# Number of resyncs kept for diagnostics
+RESYNC_HISTORY = 10
+
+RESYNC_DEVICE_TYPES = {
+    dt.PlejdDeviceType.LIGHT,
+    dt.PlejdDeviceType.SWITCH,
+    dt.PlejdDeviceType.COVER,
+}
+
+
+class PlejdResync:
+    """Requests the state of all output devices after connecting to the mesh.
+
+    Updates may have been missed while the connection was down. The state
+    of each output device is requested, the most recently used devices
+    first, in chunks which wait their turn behind interactive commands.
+    Any report from a device counts as an answer. Devices which haven't
+    answered when the deadline passes are marked unavailable until they do.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        manager: PlejdManager,
+        scheduler: PlejdMeshScheduler,
+        commands: PlejdCommandQueue,
+        devices_by_type: dict[str, list[dt.PlejdDevice]],
+    ) -> None:
+        """Initialize mesh resync."""
+        self.hass = hass
+        self.manager = manager
+        self.scheduler = scheduler
+        self.commands = commands
+        self.devices_by_type = devices_by_type
+        self.deadline = RESYNC_DEADLINE
+        self.runs = 0
+        self.history: deque[dict] = deque(maxlen=RESYNC_HISTORY)
+
+        self._running = False
+        self._started = 0.0
+        self._devices = 0
+        self._waiting: dict[int, list[dt.PlejdDevice]] = {}
+        self._unavailable: dict[int, list[dt.PlejdDevice]] = {}
+        self._task: asyncio.Task | None = None
+        self._cancel_deadline: CALLBACK_TYPE | None = None
+
+    @callback
+    def start(self) -> None:
+        """Resync the state of all output devices."""
+        self.stop()
+        self._unavailable.clear()
+        for output_type in RESYNC_DEVICE_TYPES:
+            for device in self.devices_by_type.get(output_type, ()):
+                self._waiting.setdefault(device.address, []).append(device)
+        if not self._waiting:
+            return
+
+        self.runs += 1
+        self._running = True
+        self._started = time.monotonic()
+        self._devices = len(self._waiting)
+
+        last_used = self.commands.last_used
+        addresses = sorted(
+            self._waiting,
+            key=lambda address: max(
+                last_used.get(device, 0) for device in self._waiting[address]
+            ),
+            reverse=True,
+        )
+        self._task = self.hass.async_create_background_task(
+            self._request(addresses), "Plejd mesh resync"
+        )
+
+    @callback
+    def stop(self) -> None:
+        """Stop a resync in progress."""
+        self._running = False
+        self._waiting.clear()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if self._cancel_deadline:
+            self._cancel_deadline()
+            self._cancel_deadline = None
+
+    @callback
+    def answered(self, address: int) -> None:
+        """When a device reports its state."""
+        if self._waiting.pop(address, None) is not None and not self._waiting:
+            self._finish()
+        for device in self._unavailable.pop(address, []):
+            device.set_available(True)
+
+    async def _request(self, addresses: list[int]) -> None:
+        try:
+            for i in range(0, len(addresses), RESYNC_CHUNK):
+                payloads = [
+                    f"{address:02x} 0102 00c8"
+                    for address in addresses[i : i + RESYNC_CHUNK]
+                    if address in self._waiting
+                ]
+                if not payloads:
+                    continue
+                async with self.scheduler.slot(
+                    MeshPriority.REFRESH, cost=len(payloads)
+                ):
+                    await self.commands.write(payloads)
+
+            # Devices which don't answer direct requests still report their
+            # level when the whole mesh is polled
+            if self._waiting:
+                async with self.scheduler.slot(MeshPriority.REFRESH):
+                    await self.manager.mesh.poll()
+        except (PlejdMeshBusy, BleakError, TimeoutError) as err:
+            _LOGGER.debug("Requesting device states failed: %s", err)
+        finally:
+            self._task = None
+
+        if self._running:
+            self._cancel_deadline = async_call_later(
+                self.hass, self.deadline.total_seconds(), self._finish
+            )
+
+    @callback
+    def _finish(self, *_) -> None:
+        if not self._running:
+            return
+        self._running = False
+        if self._cancel_deadline:
+            self._cancel_deadline()
+            self._cancel_deadline = None
+
+        unanswered, self._waiting = self._waiting, {}
+        for address, devices in unanswered.items():
+            for device in devices:
+                device.set_available(False)
+            self._unavailable[address] = devices
+
+        duration = time.monotonic() - self._started
+        answered = self._devices - len(unanswered)
+        _LOGGER.debug(
+            "Resynced %d of %d devices in %.1f s", answered, self._devices, duration
+        )
+        self.history.append(
+            {
+                "time": dt_util.utcnow().isoformat(),
+                "duration": round(duration, 2),
+                "devices": self._devices,
+                "answered": answered,
+                "coverage": round(answered / self._devices, 3),
+                "unanswered": sorted(unanswered),
+            }
+        )
+
+    def diagnostics(self) -> dict:
+        """Return the resync reports for diagnostics."""
+        return {
+            "runs": self.runs,
+            "running": self._running,
+            "waiting": len(self._waiting),
+            "unavailable": sorted(self._unavailable),
+            "history": list(self.history),
+        }
@@ -0,0 +1,147 @@
+"""Priority scheduling of Plejd mesh traffic."""
+
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from enum import IntEnum
+import statistics
+import time
+
+from homeassistant.exceptions import HomeAssistantError
+
+
+class MeshPriority(IntEnum):
+    """Classes of mesh traffic, most urgent first."""
+
+    INTERACTIVE = 0
+    REFRESH = 1
+    HOUSEKEEPING = 2
+
+
+# Maximum number of operations waiting in each class before new ones are refused
+MAX_WAITING = {
+    MeshPriority.INTERACTIVE: 32,
+    MeshPriority.REFRESH: 8,
+    MeshPriority.HOUSEKEEPING: 4,
+}
+
+# Payloads written to the mesh, as a burst and a sustained rate per second
+MESH_BURST = 50
+MESH_RATE = 50.0
+
+# Number of wait times kept per class for diagnostics
+WAIT_HISTORY = 50
+
+
+class PlejdMeshBusy(HomeAssistantError):
+    """Too much traffic is already waiting for the mesh."""
+
+
+class PriorityStats:
+    """Queue statistics of a class of mesh traffic."""
+
+    __slots__ = ("granted", "refused", "max_waiting", "waits")
+
+    def __init__(self) -> None:
+        self.granted = 0
+        self.refused = 0
+        self.max_waiting = 0
+        self.waits: deque[float] = deque(maxlen=WAIT_HISTORY)
+
+
+class PlejdMeshScheduler:
+    """Gives one operation at a time access to the mesh, in order of priority.
+
+    Operations of the same class are served in the order they arrive. Each
+    class can only have a limited number of operations waiting, and the
+    payloads written to the mesh are rate limited by a token bucket.
+    """
+
+    def __init__(self) -> None:
+        """Initialize mesh scheduler."""
+        self.stats = {priority: PriorityStats() for priority in MeshPriority}
+        self._waiting: dict[MeshPriority, deque[asyncio.Future]] = {
+            priority: deque() for priority in MeshPriority
+        }
+        self._busy = False
+        self._tokens = float(MESH_BURST)
+        self._refilled = time.monotonic()
+
+    @asynccontextmanager
+    async def slot(self, priority: MeshPriority, cost: int = 1):
+        """Wait for exclusive access to the mesh to write cost payloads."""
+        await self._acquire(priority)
+        try:
+            await self._throttle(cost)
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: MeshPriority) -> None:
+        stats = self.stats[priority]
+        queued = time.monotonic()
+        if self._busy or any(self._waiting.values()):
+            waiting = self._waiting[priority]
+            if len(waiting) >= MAX_WAITING[priority]:
+                stats.refused += 1
+                raise PlejdMeshBusy(f"Too much {priority.name.lower()} mesh traffic")
+
+            waiter = asyncio.get_running_loop().create_future()
+            waiting.append(waiter)
+            stats.max_waiting = max(stats.max_waiting, len(waiting))
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in waiting:
+                    waiting.remove(waiter)
+                elif not waiter.cancelled():
+                    # The slot was handed over just before the cancellation
+                    self._release()
+                raise
+        self._busy = True
+        stats.granted += 1
+        stats.waits.append(time.monotonic() - queued)
+
+    async def _throttle(self, cost: int) -> None:
+        """Wait until the token bucket allows cost payloads to be written."""
+        cost = min(cost, MESH_BURST)
+        now = time.monotonic()
+        self._tokens = min(
+            MESH_BURST, self._tokens + (now - self._refilled) * MESH_RATE
+        )
+        self._refilled = now
+        if self._tokens < cost:
+            await asyncio.sleep((cost - self._tokens) / MESH_RATE)
+            self._tokens = float(cost)
+            self._refilled = time.monotonic()
+        self._tokens -= cost
+
+    def _release(self) -> None:
+        """Hand the mesh over to the most urgent waiting operation."""
+        for waiting in self._waiting.values():
+            while waiting:
+                waiter = waiting.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self._busy = False
+
+    def diagnostics(self) -> dict:
+        """Return the queue depth and wait times of each class for diagnostics."""
+        return {
+            priority.name.lower(): {
+                "waiting": len(self._waiting[priority]),
+                "max_waiting": stats.max_waiting,
+                "granted": stats.granted,
+                "refused": stats.refused,
+                "wait_ms": (
+                    {
+                        "mean": round(statistics.mean(stats.waits) * 1000, 1),
+                        "max": round(max(stats.waits) * 1000, 1),
+                    }
+                    if stats.waits
+                    else None
+                ),
+            }
+            for priority, stats in self.stats.items()
+        }
@@ -1,13 +1,22 @@
 """Plejd site mesh controller."""
 
+import asyncio
+from contextlib import contextmanager
 from datetime import timedelta
+from functools import partial
 import logging
-from typing import cast, Callable
+import time
+from typing import cast, Callable, Iterable
 from collections import defaultdict
 
 from homeassistant.components import bluetooth
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import Platform
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.storage import Store
 
@@ -20,9 +29,47 @@ from pyplejd import (
     PLEJD_SERVICE,
     DeviceTypes as dt,
 )
+from pyplejd.cloud import PlejdCloudSite, site_details as sd
+from pyplejd.interface import (
+    outputDeviceClass,
+    inputDeviceClass,
+    sceneDeviceClass,
+)
 
-from .const import DOMAIN
-from .plejd_entity import register_unknown_device
+from .const import (
+    DOMAIN,
+    CONF_ADAPTIVE_KEEPALIVE,
+    CONF_DOUBLE_CLICK_WINDOW,
+    CONF_KEEPALIVE_IDLE,
+    CONF_LAST_SEEN_RESOLUTION,
+    CONF_LONG_PRESS_TIME,
+    CONF_OPTIMISTIC_DEADLINE,
+    CONF_OPTIMISTIC_STATE,
+    CONF_STATE_WRITE_WINDOW,
+    DEFAULT_ADAPTIVE_KEEPALIVE,
+    DEFAULT_DOUBLE_CLICK_WINDOW,
+    DEFAULT_KEEPALIVE_IDLE,
+    DEFAULT_LAST_SEEN_RESOLUTION,
+    DEFAULT_LONG_PRESS_TIME,
+    DEFAULT_OPTIMISTIC_DEADLINE,
+    DEFAULT_OPTIMISTIC_STATE,
+    DEFAULT_STATE_WRITE_WINDOW,
+    SIGNAL_DEVICE_CHANGED,
+    SIGNAL_DEVICE_REMOVED,
+)
+from .plejd_commands import PlejdCommandQueue
+from .plejd_connection import KEEPALIVE_CHECK_INTERVAL, PlejdConnectionSupervisor
+from .plejd_entity import (
+    PlejdOptimisticState,
+    PlejdStateWriter,
+    register_unknown_device,
+)
+from .plejd_gateway import PlejdGatewayRanking
+from .plejd_gesture import PlejdGestures
+from .plejd_resync import PlejdResync
+from .plejd_scheduler import PlejdMeshScheduler
+from .plejd_time import PlejdTimeSync
+from .plejd_trace import TRACE_GATEWAY, PlejdTrace
 
 
 _LOGGER = logging.getLogger(__name__)
@@ -30,6 +77,94 @@ _LOGGER = logging.getLogger(__name__)
 SITE_DATA_STORE_KEY = "plejd_site_data"
 SITE_DATA_STORE_VERSION = 1
 
+# Platforms needed for each type of device
+DEVICE_PLATFORMS = {
+    dt.PlejdDeviceType.LIGHT: [Platform.LIGHT],
+    dt.PlejdDeviceType.SWITCH: [Platform.SWITCH],
+    dt.PlejdDeviceType.BUTTON: [Platform.EVENT],
+    dt.PlejdDeviceType.MOTION: [Platform.BINARY_SENSOR],
+    dt.PlejdDeviceType.COVER: [Platform.COVER],
+    dt.PlejdDeviceType.CLIMATE: [Platform.CLIMATE],
+    dt.PlejdDeviceType.PWM: [Platform.NUMBER],
+    dt.PlejdDeviceType.SCENE: [Platform.SCENE, Platform.EVENT],
+    "HW": [Platform.BINARY_SENSOR, Platform.SENSOR],
+}
+
+# Stale connections are closed for a few devices at a time, and each device
+# gets a limited time so that a slow bluetooth proxy doesn't hold up startup
+STALE_CONNECTION_CONCURRENCY = 4
+STALE_CONNECTION_TIMEOUT = timedelta(seconds=5)
+STALE_CONNECTION_DEADLINE = timedelta(seconds=15)
+
+# State writes of the devices in an activated scene are held for at most this
+# long while waiting for all of them to report their new state
+SCENE_BATCH_TIMEOUT = timedelta(seconds=1)
+
+# Members of a scene may report their new state just before the scene event
+SCENE_EARLY_REPORT = timedelta(milliseconds=300)
+
+# Types of devices which report a new state when a scene is activated
+SCENE_MEMBER_TYPES = {
+    dt.PlejdDeviceType.LIGHT,
+    dt.PlejdDeviceType.SWITCH,
+    dt.PlejdDeviceType.COVER,
+}
+
+
+def scene_step_changes(device: dt.PlejdDevice, target: dict) -> bool:
+    """Return whether a scene step changes the reported state of a device.
+
+    The level of a step is 0-255, like the levels written to the devices.
+    """
+    state = device._state
+    level = target["level"]
+    if device.outputType == dt.PlejdDeviceType.COVER:
+        position = state.get("position")
+        return (
+            level is None
+            or position is None
+            or bool(state.get("moving"))
+            or abs(position - level * 100 / 255) > 1
+        )
+    if target["state"] is None or state.get("state") is None:
+        return True
+    if bool(state["state"]) != target["state"]:
+        return True
+    return (
+        target["state"]
+        and device.outputType == dt.PlejdDeviceType.LIGHT
+        and level is not None
+        and state.get("dim") is not None
+        and abs(state["dim"] - level) > 1
+    )
+
+
+class PlejdCachedCloudSite(PlejdCloudSite):
+    """Plejd cloud site which is loaded from cached site data only."""
+
+    async def load_site_details(self, backup=None) -> None:
+        """Load site details from the cache without contacting the cloud."""
+        self._details_raw = backup
+        self.details = sd.SiteDetails(**backup)
+
+
+def device_key(device: dt.PlejdDevice) -> tuple | str:
+    """Return a key which identifies a device between site data loads."""
+    return device.identifier or device.device_identifier
+
+
+def device_signature(device: dt.PlejdDevice) -> tuple:
+    """Return the parts of a device definition which affect its entities."""
+    return (
+        repr(device),
+        device.hidden,
+        getattr(device, "room", None),
+        str(getattr(device, "firmware", None)),
+        getattr(device, "rxAddress", None),
+        getattr(device, "deviceAddress", None),
+        getattr(device, "settings", None),
+    )
+
 
 class PlejdSite:
     """Controller for a Plejd site mesh."""
@@ -60,113 +195,211 @@ class PlejdSite:
 
         self.devices: list[dt.PlejdDevice] = []
 
+        # Indexes of self.devices, kept up to date by _index_device
+        self.device_by_key: dict[tuple | str, dt.PlejdDevice] = {}
+        self.devices_by_device_identifier: dict[str, list[dt.PlejdDevice]] = {}
+        self.devices_by_ble_mac: dict[str, list[dt.PlejdDevice]] = {}
+        self.devices_by_hw: dict[str, list[dt.PlejdDevice]] = {}
+        self.devices_by_room: dict[str, list[dt.PlejdDevice]] = {}
+        self.devices_by_type: dict[str, list[dt.PlejdDevice]] = {}
+
         self.started = False
         self.stopping = False
 
+        # Seconds spent in each phase of the last start
+        self.startup: dict[str, float] = {}
+
         self.add_device_callbacks = defaultdict(list)
+        # Key of the device the diagnostic entities of each hardware belong to
+        self.registered_hw: dict[dt.PlejdHardware, tuple | str] = {}
+        self.platforms: set[Platform] = set()
+
+        # Devices set by each scene, as (deviceId, output, target state) from
+        # the site data
+        self.scene_steps: dict[str, list[tuple[str, str | None, dict]]] = {}
+        self._scene_listeners: dict[tuple, CALLBACK_TYPE] = {}
+        # When each device which can be a scene member last reported
+        self._reported_at: dict[dt.PlejdDevice, float] = {}
+        self._trace_listeners: dict[dt.PlejdDevice, CALLBACK_TYPE] = {}
 
         self.blacklist = set(config_entry.data.get("blacklist", set()))
         self.manager.blacklist = self.blacklist
 
+        self.scheduler = PlejdMeshScheduler()
+        self.trace = PlejdTrace(hass)
+        self.connection = PlejdConnectionSupervisor(
+            hass, self.manager, self.scheduler, self.trace
+        )
+        self.gateway_ranking = PlejdGatewayRanking()
+        self.time_sync = PlejdTimeSync(
+            hass, self.manager, self.scheduler, self.devices_by_hw
+        )
+        self.state_writer = PlejdStateWriter(hass)
+        self.optimistic = PlejdOptimisticState()
+        self.gestures = PlejdGestures(hass)
+        self.commands = PlejdCommandQueue(hass, self.manager, self.scheduler)
+        self.resync = PlejdResync(
+            hass, self.manager, self.scheduler, self.commands, self.devices_by_type
+        )
+
+        # Let the supervisor know when the mesh connection is lost,
+        # and resync the device states and check the mesh clock after connecting
+        connect_callback = self.manager.connect_callback
+
+        def _connect_callback(connected: bool) -> None:
+            connect_callback(connected)
+            gateway = self.manager.mesh._gateway_node
+            self.trace.record(
+                TRACE_GATEWAY,
+                connected=connected,
+                gateway=gateway.BLEaddress if gateway else None,
+            )
+            if connected:
+                self.resync.start()
+                self.time_sync.connected()
+            else:
+                self.resync.stop()
+                self.connection.connection_lost()
+
+        self.manager.connect_callback = _connect_callback
+
+        # Let the supervisor and resync know when traffic is received from the mesh
+        lastdata_callback = self.manager.lastdata_callback
+        lightlevel_callback = self.manager.lightlevel_callback
+
+        async def _lastdata_callback(data) -> None:
+            self.connection.traffic_received()
+            self.resync.answered(data.address)
+            await lastdata_callback(data)
+
+        async def _lightlevel_callback(lightlevels) -> None:
+            self.connection.traffic_received()
+            for lightlevel in lightlevels:
+                self.resync.answered(lightlevel.address)
+            await lightlevel_callback(lightlevels)
+
+        self.manager.lastdata_callback = _lastdata_callback
+        self.manager.lightlevel_callback = _lightlevel_callback
+
+        self._apply_options()
+
     def register_platform_add_device_callback(
         self,
-        callback: Callable[[dt.PlejdDevice, "PlejdSite"], None],
+        callback: Callable[[dt.PlejdDevice, "PlejdSite"], list[Entity]],
         output_type: dt.PlejdDeviceType,
+        async_add_entities: AddEntitiesCallback,
     ) -> None:
-        self.add_device_callbacks[output_type].append(callback)
+        """Register a callback which creates entities for a type of device.
+
+        Entities created for all devices are collected per platform and
+        added to the platform in one call.
+        """
+        self.add_device_callbacks[output_type].append((callback, async_add_entities))
+
+    @contextmanager
+    def _startup_phase(self, phase: str):
+        """Record how long a phase of the start takes."""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.startup[phase] = time.monotonic() - started
 
     async def start(self) -> None:
         """Setup and connect to plejd site."""
-        if not (site_data_cache := await self.store.async_load()) or not isinstance(
-            site_data_cache, dict
-        ):
-            site_data_cache = {}
+        self.startup = {}
+        started = time.monotonic()
 
+        with self._startup_phase("store_load"):
+            site_data_cache = await self._load_site_data_cache()
         cached_site_data = site_data_cache.get(self.credentials["siteId"])
 
-        await self.manager.init(cached_site_data)
-
-        self.devices = self.manager.devices
-        registered_hw = set()
-
-        for device in self.devices:
-            if adders := self.add_device_callbacks.get(device.outputType):
-                for adder in adders:
-                    adder(device, self)
-            else:
-                if device.outputType:
-                    register_unknown_device(
-                        self.hass, device, self.config_entry.entry_id
-                    )
-            if device.is_primary and device.hw and device.hw not in registered_hw:
-                if adders := self.add_device_callbacks.get("HW"):
-                    for adder in adders:
-                        adder(device, self)
-                registered_hw.add(device.hw)
-
-        # Close any stale connections that may be open
-        for dev in self.devices:
-            if dev.BLEaddress:
-                ble_device = bluetooth.async_ble_device_from_address(
-                    self.hass, dev.BLEaddress, True
+        if cached_site_data:
+            # Set up everything from the cached site data right away
+            # and fetch fresh site data from the cloud in the background
+            self.manager.cloud = PlejdCachedCloudSite(**self.credentials)
+
+        with self._startup_phase("manager_init"):
+            await self.manager.init(cached_site_data)
+
+        with self._startup_phase("device_index"):
+            self.devices = self.manager.devices
+            self._load_scene_steps(self.manager.cloud._details_raw)
+            for device in self.devices:
+                self._index_device(device)
+                self._watch_scene(device)
+                self._trace_device(device)
+
+        with self._startup_phase("platform_setup"):
+            await self._async_setup_platforms()
+        with self._startup_phase("entity_creation"):
+            self._add_devices(self.devices)
+
+        with self._startup_phase("stale_connections"):
+            await self._close_stale_connections()
+
+        with self._startup_phase("discovery_replay"):
+            # Register callback for bluetooth discover
+            self.config_entry.async_on_unload(
+                bluetooth.async_register_callback(
+                    self.hass,
+                    self._discovered,
+                    bluetooth.match.BluetoothCallbackMatcher(
+                        connectable=True, service_uuid=PLEJD_SERVICE.lower()
+                    ),
+                    bluetooth.BluetoothScanningMode.PASSIVE,
                 )
-                if ble_device:
-                    await self.manager.close_stale(ble_device)
-
-        # Register callback for bluetooth discover
-        self.config_entry.async_on_unload(
-            bluetooth.async_register_callback(
-                self.hass,
-                self._discovered,
-                bluetooth.match.BluetoothCallbackMatcher(
-                    connectable=True, service_uuid=PLEJD_SERVICE.lower()
-                ),
-                bluetooth.BluetoothScanningMode.PASSIVE,
             )
-        )
 
-        # Run through already discovered devices and add plejds to the manager
-        for service_info in bluetooth.async_discovered_service_info(self.hass, True):
-            if PLEJD_SERVICE.lower() in service_info.advertisement.service_uuids:
-                self._discovered(service_info, connect=False)
+            # Run through already discovered devices and add plejds to the manager
+            for service_info in bluetooth.async_discovered_service_info(
+                self.hass, True
+            ):
+                if PLEJD_SERVICE.lower() in service_info.advertisement.service_uuids:
+                    self._discovered(service_info, connect=False)
 
-        # Ping the mesh periodically to maintain the connection
+        # Ping the mesh when idle to maintain the connection
         self.config_entry.async_on_unload(
             async_track_time_interval(
                 self.hass,
-                self._ping,
-                self.manager.ping_interval,
+                self.connection.keep_alive,
+                KEEPALIVE_CHECK_INTERVAL,
                 name="Plejd keep-alive",
             )
         )
-
-        # Check that the mesh clock is in sync once per hour
         self.config_entry.async_on_unload(
-            async_track_time_interval(
-                self.hass,
-                self._broadcast_time,
-                timedelta(hours=1),
-                name="Plejd sync time",
-            )
+            self.config_entry.add_update_listener(self._async_options_updated)
         )
 
         self.started = True
+        self.startup["total"] = time.monotonic() - started
+        _LOGGER.debug(
+            "Started with %d devices in %.2f s",
+            len(self.devices),
+            self.startup["total"],
+        )
 
-        self.hass.async_create_task(self._ping())
-        self.hass.async_create_task(self._broadcast_time())
+        self.time_sync.start()
+        self.connection.start()
+
+        if cached_site_data:
+            self.config_entry.async_create_background_task(
+                self.hass,
+                self._refresh_site_data(cached_site_data),
+                "Plejd site data refresh",
+            )
 
     async def stop(self, *_) -> None:
         """Disconnect mesh and tear down site configuration."""
         self.stopping = True
+        self.connection.stop()
+        self.time_sync.stop()
+        self.resync.stop()
+        self.trace.stop()
+        self.state_writer.stop()
+        self.commands.stop()
 
-        if not (site_data_cache := await self.store.async_load()) or not isinstance(
-            site_data_cache, dict
-        ):
-            site_data_cache = {}
-        site_data_cache[self.credentials["siteId"]] = (
-            await self.manager.get_raw_sitedata()
-        )
-        await self.store.async_save(site_data_cache)
+        await self._save_site_data(await self.manager.get_raw_sitedata())
 
         await self.manager.disconnect()
 
@@ -176,28 +409,471 @@ class PlejdSite:
         self.hass.config_entries.async_update_entry(self.config_entry, data=data)
         await self.manager.set_blacklist(self.blacklist)
 
+    def _apply_options(self) -> None:
+        """Apply the options of the config entry."""
+        options = self.config_entry.options
+        self.connection.adaptive_keepalive = options.get(
+            CONF_ADAPTIVE_KEEPALIVE, DEFAULT_ADAPTIVE_KEEPALIVE
+        )
+        self.connection.keepalive_idle = timedelta(
+            seconds=options.get(CONF_KEEPALIVE_IDLE, DEFAULT_KEEPALIVE_IDLE)
+        )
+        self.state_writer.window = timedelta(
+            milliseconds=options.get(
+                CONF_STATE_WRITE_WINDOW, DEFAULT_STATE_WRITE_WINDOW
+            )
+        )
+        self.last_seen_resolution = timedelta(
+            seconds=options.get(CONF_LAST_SEEN_RESOLUTION, DEFAULT_LAST_SEEN_RESOLUTION)
+        )
+        self.gestures.double_click = timedelta(
+            milliseconds=options.get(
+                CONF_DOUBLE_CLICK_WINDOW, DEFAULT_DOUBLE_CLICK_WINDOW
+            )
+        )
+        self.gestures.long_press = timedelta(
+            milliseconds=options.get(CONF_LONG_PRESS_TIME, DEFAULT_LONG_PRESS_TIME)
+        )
+        self.optimistic.enabled = options.get(
+            CONF_OPTIMISTIC_STATE, DEFAULT_OPTIMISTIC_STATE
+        )
+        self.optimistic.deadline = timedelta(
+            milliseconds=options.get(
+                CONF_OPTIMISTIC_DEADLINE, DEFAULT_OPTIMISTIC_DEADLINE
+            )
+        )
+
+    async def _async_options_updated(self, *_) -> None:
+        """When the config entry is updated."""
+        self._apply_options()
+
+    def _device_indexes(self, device: dt.PlejdDevice):
+        """Yield the indexes a device belongs in and its key in each."""
+        yield self.devices_by_type, device.outputType
+        if device.outputType == dt.PlejdDeviceType.SCENE:
+            return
+        yield self.devices_by_device_identifier, device.device_identifier
+        yield self.devices_by_ble_mac, device.ble_mac
+        yield self.devices_by_room, device.room
+        if device.hw:
+            yield self.devices_by_hw, device.hw.BLEaddress
+
+    def _index_device(self, device: dt.PlejdDevice) -> None:
+        """Add a device to the lookup indexes."""
+        self.device_by_key[device_key(device)] = device
+        for index, key in self._device_indexes(device):
+            index.setdefault(key, []).append(device)
+
+    def _unindex_device(self, device: dt.PlejdDevice) -> None:
+        """Remove a device from the lookup indexes."""
+        self.device_by_key.pop(device_key(device), None)
+        for index, key in self._device_indexes(device):
+            if devices := index.get(key):
+                devices.remove(device)
+                if not devices:
+                    del index[key]
+
+    def _load_scene_steps(self, site_data: dict | None) -> None:
+        """Read which devices are set by each scene from raw site data."""
+        self.scene_steps = {}
+        for step in (site_data or {}).get("sceneSteps") or []:
+            output, state = step.get("output"), step.get("state")
+            target = {
+                "state": None if state is None else state == "On",
+                "level": step.get("value"),
+            }
+            self.scene_steps.setdefault(step["sceneId"], []).append(
+                (step["deviceId"], None if output is None else str(output), target)
+            )
+
+    def _scene_members(self, scene: dt.PlejdScene) -> set[dt.PlejdDevice]:
+        """Return the devices which are expected to report when a scene is set.
+
+        Devices which the scene leaves as they are, and devices which have
+        just reported and so are taken to have reported their new state
+        before the scene event arrived, are left out.
+        """
+        early = time.monotonic() - SCENE_EARLY_REPORT.total_seconds()
+        return {
+            device
+            for device_id, output, target in self.scene_steps.get(
+                scene.identifier[0], ()
+            )
+            for device in self.devices_by_hw.get(device_id, ())
+            if device.outputType in SCENE_MEMBER_TYPES
+            and (output is None or device.identifier[2] == output)
+            and self._reported_at.get(device, 0) < early
+            and scene_step_changes(device, target)
+        }
+
+    def _watch_scene(self, device: dt.PlejdDevice) -> None:
+        """Batch the state writes which follow an activation of a scene."""
+        if device.outputType in SCENE_MEMBER_TYPES:
+
+            def _reported(data: dict) -> None:
+                self._reported_at[device] = time.monotonic()
+
+            self._scene_listeners[device.identifier] = device.subscribe(_reported)
+            return
+        if device.outputType != dt.PlejdDeviceType.SCENE:
+            return
+
+        def _listener(data: dict) -> None:
+            if not data.get("triggered"):
+                return
+            if members := self._scene_members(device):
+                self.state_writer.begin_batch(
+                    device.identifier, members, SCENE_BATCH_TIMEOUT
+                )
+
+        self._scene_listeners[device.identifier] = device.subscribe(_listener)
+
+    def _unwatch_scene(self, device: dt.PlejdDevice) -> None:
+        self._reported_at.pop(device, None)
+        if remove := self._scene_listeners.pop(device.identifier, None):
+            remove()
+
+    def _trace_device(self, device: dt.PlejdDevice) -> None:
+        """Pass the state updates of a device on to the trace."""
+        self._trace_listeners[device] = device.subscribe(
+            partial(self.trace.record_device, device)
+        )
+
+    def _untrace_device(self, device: dt.PlejdDevice) -> None:
+        if remove := self._trace_listeners.pop(device, None):
+            remove()
+
+    async def _async_setup_platforms(self) -> None:
+        """Set up the platforms needed by the devices which are not yet loaded."""
+        platforms = set()
+        for output_type in self.devices_by_type:
+            platforms.update(DEVICE_PLATFORMS.get(output_type, ()))
+        if self.devices_by_hw:
+            platforms.update(DEVICE_PLATFORMS["HW"])
+        if any(devices[0].hw._powered for devices in self.devices_by_hw.values()):
+            platforms.add(Platform.SWITCH)
+
+        if new_platforms := platforms - self.platforms:
+            _LOGGER.debug("Setting up platforms: %s", new_platforms)
+            self.platforms |= new_platforms
+            config_entries = self.hass.config_entries
+            if self.started and hasattr(
+                config_entries, "async_late_forward_entry_setups"
+            ):
+                # After the entry is set up, platforms must be forwarded while
+                # holding its setup lock. Before Home Assistant 2024.7 they
+                # could be forwarded at any time.
+                await config_entries.async_late_forward_entry_setups(
+                    self.config_entry, new_platforms
+                )
+            else:
+                await config_entries.async_forward_entry_setups(
+                    self.config_entry, new_platforms
+                )
+
+    def _add_devices(
+        self, devices: list[dt.PlejdDevice], hardware: Iterable[dt.PlejdHardware] = ()
+    ) -> None:
+        """Create entities for devices and add them to their platforms.
+
+        The diagnostic entities of a hardware are created with the first of
+        its devices, and those of the given hardware, whose entities went
+        with a removed device, with one of the devices it has left.
+        """
+        entities = defaultdict(list)
+
+        def _create(device: dt.PlejdDevice, output_type) -> bool:
+            if not (adders := self.add_device_callbacks.get(output_type)):
+                return False
+            for adder, async_add_entities in adders:
+                for entity in adder(device, self):
+                    entity.state_writer = self.state_writer
+                    entity.command_queue = self.commands
+                    entity.optimistic = self.optimistic
+                    entities[async_add_entities].append(entity)
+            return True
+
+        def _create_hw(device: dt.PlejdDevice) -> None:
+            _create(device, "HW")
+            self.registered_hw[device.hw] = device_key(device)
+
+        for device in devices:
+            if not _create(device, device.outputType) and device.outputType:
+                register_unknown_device(self.hass, device, self.config_entry.entry_id)
+            if device.is_primary and device.hw and device.hw not in self.registered_hw:
+                _create_hw(device)
+        for hw in hardware:
+            if hw not in self.registered_hw and hw.devices:
+                _create_hw(min(hw.devices, key=lambda device: device.device_identifier))
+
+        for async_add_entities, new_entities in entities.items():
+            if new_entities:
+                async_add_entities(new_entities)
+
+    async def _load_site_data_cache(self) -> dict:
+        """Load the cached site data of all sites."""
+        if not (site_data_cache := await self.store.async_load()) or not isinstance(
+            site_data_cache, dict
+        ):
+            site_data_cache = {}
+        return site_data_cache
+
+    async def _save_site_data(self, site_data: dict | None) -> None:
+        """Save site data to the cache."""
+        site_data_cache = await self._load_site_data_cache()
+        site_data_cache[self.credentials["siteId"]] = site_data
+        await self.store.async_save(site_data_cache)
+
+    async def _refresh_site_data(self, cached_site_data: dict) -> None:
+        """Fetch site data from the cloud and apply changes since the cache."""
+        cloud = PlejdCloudSite(**self.credentials)
+        try:
+            await cloud.get_details()
+        except AuthenticationError:
+            _LOGGER.warning("Plejd cloud credentials were rejected")
+            self.config_entry.async_start_reauth(self.hass)
+            return
+        except ConnectionError:
+            _LOGGER.warning("Failed to refresh site data. Using cached site data.")
+            return
+        if self.stopping:
+            return
+
+        self.manager.cloud = cloud
+        await self._save_site_data(cloud._details_raw)
+
+        if cloud._details_raw == cached_site_data:
+            _LOGGER.debug("Cached site data is up to date")
+            return
+        await self._apply_site_details(cloud)
+
+    async def _apply_site_details(self, cloud: PlejdCloudSite) -> None:
+        """Add, remove and replace devices which differ from the loaded ones."""
+        manager = self.manager
+        mesh = manager.mesh
+
+        fresh: dict[tuple | str, dt.PlejdDevice] = {}
+        for data, deviceClass in (
+            (cloud.outputs, outputDeviceClass),
+            (cloud.inputs, inputDeviceClass),
+            (cloud.scenes, sceneDeviceClass),
+        ):
+            for item in data:
+                device = deviceClass(item)(**item, mesh=mesh)
+                fresh[device_key(device)] = device
+        current = self.device_by_key.copy()
+
+        added = [key for key in fresh if key not in current]
+        removed = [key for key in current if key not in fresh]
+        changed = [
+            key
+            for key in fresh
+            if key in current
+            and device_signature(fresh[key]) != device_signature(current[key])
+        ]
+        # A device which became another type of device needs other entities
+        replaced = [
+            key
+            for key in changed
+            if type(fresh[key]) is not type(current[key])
+            or fresh[key].outputType != current[key].outputType
+        ]
+        _LOGGER.debug(
+            "Site data changed: %d added, %d removed, %d changed, %d replaced",
+            len(added),
+            len(removed),
+            len(changed) - len(replaced),
+            len(replaced),
+        )
+        changed = [key for key in changed if key not in replaced]
+        added += replaced
+        removed += replaced
+
+        # The diagnostic entities of the hardware go with the device they
+        # were created with, and are created again from another device
+        orphaned = {
+            current[key].hw
+            for key in removed
+            if current[key].hw and self.registered_hw.get(current[key].hw) == key
+        }
+        for hw in orphaned:
+            del self.registered_hw[hw]
+
+        self._load_scene_steps(cloud._details_raw)
+        for key in removed + changed:
+            device = current[key]
+            self._unindex_device(device)
+            self._unwatch_scene(device)
+            self._untrace_device(device)
+            self.devices.remove(device)
+            if device.hw:
+                device.hw.devices.discard(device)
+        for key in added + changed:
+            device = fresh[key]
+            self.devices.append(device)
+            if device.BLEaddress:
+                hw = manager._get_hw(device.BLEaddress, device)
+                hw.devices.add(device)
+                device.hw = hw
+                mesh.expect_device(hw)
+            self._index_device(device)
+            self._watch_scene(device)
+            self._trace_device(device)
+
+        device_registry = dr.async_get(self.hass)
+        for key in removed:
+            device = current[key]
+            if device.identifier:
+                async_dispatcher_send(
+                    self.hass,
+                    SIGNAL_DEVICE_REMOVED.format(":".join(device.identifier)),
+                )
+            if device.outputType == dt.PlejdDeviceType.SCENE:
+                continue
+            if device.device_identifier in self.devices_by_device_identifier:
+                continue
+            if entry := device_registry.async_get_device(
+                identifiers={(DOMAIN, device.device_identifier)}
+            ):
+                device_registry.async_update_device(
+                    entry.id, remove_config_entry_id=self.config_entry.entry_id
+                )
+
+        for key in changed:
+            device = fresh[key]
+            if device.identifier:
+                async_dispatcher_send(
+                    self.hass,
+                    SIGNAL_DEVICE_CHANGED.format(":".join(device.identifier)),
+                    device,
+                )
+            if device.outputType == dt.PlejdDeviceType.SCENE:
+                continue
+            if entry := device_registry.async_get_device(
+                identifiers={(DOMAIN, device.device_identifier)}
+            ):
+                device_registry.async_update_device(
+                    entry.id,
+                    name=device.name,
+                    model=device.hardware,
+                    sw_version=str(device.firmware),
+                )
+
+        await self._async_setup_platforms()
+        self._add_devices([fresh[key] for key in added], orphaned)
+
+        if mesh._crypto_key != cloud.cryptokey:
+            # Reconnect to authenticate with the new key
+            mesh.set_key(cloud.cryptokey)
+            await manager.disconnect()
+            self.connection.request(immediate=True)
+        else:
+            for key in added + changed:
+                fresh[key].set_available(manager.connected)
+
+    async def _close_stale_connections(self) -> None:
+        """Close any stale connections that may be open."""
+        addresses = self.devices_by_hw.keys()
+        ble_devices = [
+            ble_device
+            for address in addresses
+            if (
+                ble_device := bluetooth.async_ble_device_from_address(
+                    self.hass, address, True
+                )
+            )
+        ]
+        skipped = len(addresses) - len(ble_devices)
+        if not ble_devices:
+            _LOGGER.debug("No stale connections to close (%d skipped)", skipped)
+            return
+
+        semaphore = asyncio.Semaphore(STALE_CONNECTION_CONCURRENCY)
+
+        async def _close(ble_device) -> None:
+            async with semaphore:
+                async with asyncio.timeout(STALE_CONNECTION_TIMEOUT.total_seconds()):
+                    await self.manager.close_stale(ble_device)
+
+        tasks = [
+            self.hass.async_create_task(_close(ble_device))
+            for ble_device in ble_devices
+        ]
+        done, pending = await asyncio.wait(
+            tasks, timeout=STALE_CONNECTION_DEADLINE.total_seconds()
+        )
+        for task in pending:
+            task.cancel()
+
+        errors = [task.exception() for task in done]
+        closed = errors.count(None)
+        timed_out = len(pending) + sum(isinstance(e, TimeoutError) for e in errors)
+        failed = len(tasks) - closed - timed_out
+        (_LOGGER.warning if timed_out or failed else _LOGGER.debug)(
+            "Stale connection cleanup: %d closed, %d timed out, %d failed, %d skipped",
+            closed,
+            timed_out,
+            failed,
+            skipped,
+        )
+
     def _discovered(
         self, service_info: BluetoothServiceInfoBleak, *_, connect: bool = True
     ) -> None:
         """Register any discovered plejd device with the manager."""
+        # Record the reading before the manager notifies the diagnostic sensors
+        address = service_info.address.replace(":", "").upper()
+        if devices := self.devices_by_hw.get(address):
+            score = self.gateway_ranking.add(
+                address, service_info.source, service_info.rssi
+            )
+
         new_device = self.manager.add_mesh_device(
             service_info.device, service_info.rssi
         )
-        if connect and new_device:
-            self.hass.async_create_task(self._ping())
-
-    async def _ping(self, *_) -> None:
-        """Ping the plejd mesh to connect or maintain the connection."""
-        if self.stopping or not self.started:
-            return
-        if not await self.manager.ping():
-            _LOGGER.debug("Ping failed")
 
-    async def _broadcast_time(self, *_) -> None:
-        """Check that the mesh clock is in sync."""
-        if self.stopping:
-            return
-        await self.manager.broadcast_time()
+        # The manager tries gateways in order of rssi, so replace the reading
+        # with a score which favors stable links over a single strong reading
+        if devices:
+            devices[0].hw.rssi = round(score)
+        if connect and new_device:
+            # A new gateway is worth trying at once, even when backing off
+            self.connection.request(immediate=True)
+
+    def diagnostics(self) -> dict:
+        """Return the runtime state of the site for diagnostics."""
+        return {
+            "startup": {
+                phase: round(duration, 3) for phase, duration in self.startup.items()
+            },
+            "connection": self.connection.diagnostics(),
+            "time_sync": self.time_sync.diagnostics(),
+            "state_writes": self.state_writer.diagnostics(),
+            "gestures": self.gestures.diagnostics(),
+            "commands": self.commands.diagnostics(),
+            "resync": self.resync.diagnostics(),
+            "optimistic": self.optimistic.diagnostics(),
+            "scheduler": self.scheduler.diagnostics(),
+            "hardware": {
+                address: {
+                    "last_seen": hw.last_seen and hw.last_seen.isoformat(),
+                    "rssi": self.gateway_ranking.latest(address),
+                }
+                for address, devices in self.devices_by_hw.items()
+                if (hw := devices[0].hw)
+            },
+            "gateway_ranking": [
+                {
+                    "address": address,
+                    "score": round(score, 1),
+                    "connectable": devices[0].hw.connectable,
+                    "is_gateway": devices[0].hw.is_gateway,
+                    "links": self.gateway_ranking.links(address),
+                }
+                for address, score in self.gateway_ranking.ranking()
+                if (devices := self.devices_by_hw.get(address))
+            ],
+        }
 
 
 def get_plejd_site_from_config_entry(
@@ -0,0 +1,187 @@
+"""Plejd mesh clock synchronisation."""
+
+from collections import deque
+from datetime import datetime, timedelta
+import logging
+import time
+
+from bleak import BleakError
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from pyplejd import PlejdManager, DeviceTypes as dt
+from pyplejd.ble import ble_characteristics as gatt, payload_encode
+from pyplejd.ble.crypto import encrypt_decrypt
+
+from .plejd_scheduler import MeshPriority, PlejdMeshBusy, PlejdMeshScheduler
+
+_LOGGER = logging.getLogger(__name__)
+
+# The mesh clock is set when it differs more than this from Home Assistant
+TIME_SYNC_TOLERANCE = timedelta(seconds=60)
+
+# The check interval doubles while the clock is stable and halves after a sync
+TIME_SYNC_INTERVAL_MIN = timedelta(minutes=15)
+TIME_SYNC_INTERVAL_MAX = timedelta(hours=24)
+
+# Delay before checking the clock after connecting to the mesh
+TIME_SYNC_CONNECT_DELAY = timedelta(seconds=30)
+
+# Number of drift measurements kept for diagnostics
+TIME_SYNC_HISTORY = 24
+
+
+class PlejdTimeSync:
+    """Keeps the mesh clock in sync with Home Assistant.
+
+    The clock is checked less often while it stays within tolerance, and
+    soon after each (re)connection, since the mesh may have lost track of
+    time during an outage or the new gateway may have a different clock.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        manager: PlejdManager,
+        scheduler: PlejdMeshScheduler,
+        devices_by_hw: dict[str, list[dt.PlejdDevice]],
+    ) -> None:
+        """Initialize mesh clock synchronisation."""
+        self.hass = hass
+        self.manager = manager
+        self.scheduler = scheduler
+        self.devices_by_hw = devices_by_hw
+
+        self.interval = TIME_SYNC_INTERVAL_MIN
+        self.drift: deque[tuple[datetime, float]] = deque(maxlen=TIME_SYNC_HISTORY)
+        self.checks = 0
+        self.syncs = 0
+        self.last_check: datetime | None = None
+        self.last_sync: datetime | None = None
+        self.next_check: datetime | None = None
+        self.gateway: str | None = None
+        self.gateway_changes = 0
+
+        self._running = False
+        self._check_in_flight = False
+        self._cancel_check: CALLBACK_TYPE | None = None
+
+    def start(self) -> None:
+        """Start checking the mesh clock."""
+        self._running = True
+        self._schedule(self.interval)
+
+    def stop(self) -> None:
+        """Stop checking the mesh clock."""
+        self._running = False
+        if self._cancel_check:
+            self._cancel_check()
+            self._cancel_check = None
+
+    @callback
+    def connected(self) -> None:
+        """When a connection to the mesh is made."""
+        gateway = self.manager.mesh._gateway_node
+        gateway = gateway.BLEaddress if gateway else None
+        if self.gateway and gateway != self.gateway:
+            self.gateway_changes += 1
+        self.gateway = gateway
+
+        self.interval = TIME_SYNC_INTERVAL_MIN
+        if self._running:
+            self._schedule(TIME_SYNC_CONNECT_DELAY)
+
+    def _schedule(self, delay: timedelta) -> None:
+        if self._cancel_check:
+            self._cancel_check()
+        self.next_check = dt_util.utcnow() + delay
+        self._cancel_check = async_call_later(
+            self.hass, delay.total_seconds(), self._start_check
+        )
+
+    @callback
+    def _start_check(self, *_) -> None:
+        self._cancel_check = None
+        if self._check_in_flight:
+            return
+        self._check_in_flight = True
+        self.hass.async_create_background_task(self._check(), "Plejd time sync")
+
+    async def _check(self) -> None:
+        """Measure the mesh clock drift and set the clock if needed."""
+        try:
+            async with self.scheduler.slot(MeshPriority.HOUSEKEEPING, cost=2):
+                drift = await self._measure_drift()
+                if drift is None:
+                    _LOGGER.debug("Could not read the mesh clock")
+                elif abs(drift) > TIME_SYNC_TOLERANCE.total_seconds():
+                    _LOGGER.debug("Mesh clock is off by %.0f s. Setting time", drift)
+                    await self.manager.mesh.broadcast_time()
+                    self.syncs += 1
+                    self.last_sync = dt_util.utcnow()
+                    self.interval = max(self.interval / 2, TIME_SYNC_INTERVAL_MIN)
+                else:
+                    self.interval = min(self.interval * 2, TIME_SYNC_INTERVAL_MAX)
+        except PlejdMeshBusy as err:
+            _LOGGER.debug("Skipping mesh clock check: %s", err)
+        except Exception:
+            _LOGGER.exception("Unexpected error when syncing mesh time")
+        finally:
+            self._check_in_flight = False
+
+        if self._running:
+            self._schedule(self.interval)
+
+    async def _measure_drift(self) -> float | None:
+        """Return how many seconds the mesh clock is ahead of Home Assistant."""
+        mesh = self.manager.mesh
+        client = mesh._client
+        gateway = mesh._gateway_node
+        if client is None or gateway is None:
+            return None
+        device = next(
+            (
+                devices[0]
+                for devices in self.devices_by_hw.values()
+                if devices[0].powered
+            ),
+            None,
+        )
+        if device is None:
+            return None
+
+        try:
+            await mesh.write(payload_encode.request_time(mesh, device.address))
+            response = await client.read_gatt_char(gatt.PLEJD_LASTDATA)
+        except (BleakError, TimeoutError) as err:
+            _LOGGER.debug("Failed to read the mesh clock: %s", err)
+            return None
+        data = encrypt_decrypt(mesh._crypto_key, gateway.BLEaddress, response)
+        mesh_time = int.from_bytes(data[5:9], "little")
+
+        # The mesh keeps local time, adjusted the same way as when it is set
+        drift = mesh_time - (time.time() + 3600 * time.daylight)
+
+        self.checks += 1
+        self.last_check = dt_util.utcnow()
+        self.drift.append((self.last_check, drift))
+        return drift
+
+    def diagnostics(self) -> dict:
+        """Return the clock synchronisation state for diagnostics."""
+        return {
+            "drift": round(self.drift[-1][1]) if self.drift else None,
+            "checks": self.checks,
+            "syncs": self.syncs,
+            "last_check": self.last_check and self.last_check.isoformat(),
+            "last_sync": self.last_sync and self.last_sync.isoformat(),
+            "next_check": self.next_check and self.next_check.isoformat(),
+            "interval": self.interval.total_seconds(),
+            "gateway": self.gateway,
+            "gateway_changes": self.gateway_changes,
+            "history": [
+                {"time": checked.isoformat(), "drift": round(drift)}
+                for checked, drift in self.drift
+            ],
+        }
@@ -0,0 +1,192 @@
+"""Live trace of Plejd mesh events."""
+
+from collections import deque
+from collections.abc import Collection
+from datetime import timedelta
+import logging
+from typing import Callable
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from pyplejd import DeviceTypes as dt
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_STATE = "state"
+TRACE_BUTTON = "button"
+TRACE_SCENE = "scene"
+TRACE_GATEWAY = "gateway"
+TRACE_PING = "ping"
+
+TRACE_EVENT_TYPES = [
+    TRACE_STATE,
+    TRACE_BUTTON,
+    TRACE_SCENE,
+    TRACE_GATEWAY,
+    TRACE_PING,
+]
+
+# Events are delivered to subscribers in batches this often
+TRACE_FLUSH_INTERVAL = timedelta(milliseconds=100)
+
+# Events buffered per subscriber before the oldest are dropped
+TRACE_BUFFER_SIZE = 1000
+
+
+class PlejdTraceSubscription:
+    """A subscriber to the trace, with its filters and buffered events."""
+
+    __slots__ = (
+        "deliver",
+        "end",
+        "devices",
+        "rooms",
+        "event_types",
+        "buffer",
+        "dropped",
+    )
+
+    def __init__(
+        self,
+        deliver: Callable[[list[dict], int], None],
+        end: Callable[[], None] | None,
+        devices: Collection[str] | None,
+        rooms: Collection[str] | None,
+        event_types: Collection[str] | None,
+        buffer_size: int,
+    ) -> None:
+        self.deliver = deliver
+        self.end = end
+        self.devices = set(devices) if devices else None
+        self.rooms = set(rooms) if rooms else None
+        self.event_types = set(event_types) if event_types else None
+        self.buffer: deque[dict] = deque(maxlen=buffer_size)
+        self.dropped = 0
+
+    def matches(self, event: dict) -> bool:
+        """Return whether an event passes the filters."""
+        if self.event_types and event["type"] not in self.event_types:
+            return False
+        if self.devices and not (
+            event.get("device") in self.devices or event.get("name") in self.devices
+        ):
+            return False
+        if self.rooms and event.get("room") not in self.rooms:
+            return False
+        return True
+
+
+class PlejdTrace:
+    """Streams decoded mesh events to subscribers.
+
+    Events are buffered per subscriber and delivered in batches. When a
+    subscriber's buffer is full, the oldest events are dropped and counted,
+    so a slow subscriber never holds up the integration.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize mesh trace."""
+        self.hass = hass
+        self._subscriptions: list[PlejdTraceSubscription] = []
+        self._cancel_flush: CALLBACK_TYPE | None = None
+
+    @callback
+    def subscribe(
+        self,
+        deliver: Callable[[list[dict], int], None],
+        devices: Collection[str] | None = None,
+        rooms: Collection[str] | None = None,
+        event_types: Collection[str] | None = None,
+        buffer_size: int = TRACE_BUFFER_SIZE,
+        end: Callable[[], None] | None = None,
+    ) -> CALLBACK_TYPE:
+        """Subscribe to mesh events.
+
+        deliver is called with a batch of events and the number of events
+        dropped since the last batch. Devices are matched by unique id or
+        name. end is called if the trace stops, e.g. when the config entry
+        is unloaded. Returns a function which ends the subscription.
+        """
+        subscription = PlejdTraceSubscription(
+            deliver, end, devices, rooms, event_types, buffer_size
+        )
+        self._subscriptions.append(subscription)
+
+        @callback
+        def _unsubscribe() -> None:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+        return _unsubscribe
+
+    @callback
+    def record(
+        self, event_type: str, device: dt.PlejdDevice | None = None, **data
+    ) -> None:
+        """Record an event, if anyone is listening."""
+        if not self._subscriptions:
+            return
+        event = {"type": event_type, "time": dt_util.utcnow().isoformat()}
+        if device is not None:
+            event["device"] = device.identifier and ":".join(device.identifier)
+            event["name"] = device.name
+            # Scenes don't belong to a room
+            event["room"] = getattr(device, "room", None)
+            event["address"] = device.address
+        event.update(data)
+
+        for subscription in self._subscriptions:
+            if not subscription.matches(event):
+                continue
+            if len(subscription.buffer) == subscription.buffer.maxlen:
+                subscription.dropped += 1
+            subscription.buffer.append(event)
+        if not self._cancel_flush:
+            self._cancel_flush = self.hass.loop.call_later(
+                TRACE_FLUSH_INTERVAL.total_seconds(), self._flush
+            ).cancel
+
+    @callback
+    def record_device(self, device: dt.PlejdDevice, state: dict) -> None:
+        """Record a state update from a device."""
+        if not self._subscriptions:
+            return
+        if device.outputType == dt.PlejdDeviceType.BUTTON:
+            event_type = TRACE_BUTTON
+        elif device.outputType == dt.PlejdDeviceType.SCENE:
+            event_type = TRACE_SCENE
+        else:
+            event_type = TRACE_STATE
+        # The device keeps updating the same state dict
+        self.record(event_type, device, state=dict(state))
+
+    @callback
+    def stop(self) -> None:
+        """Deliver the buffered events and end all subscriptions."""
+        if self._cancel_flush:
+            self._cancel_flush()
+            self._flush()
+        subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            if not subscription.end:
+                continue
+            try:
+                subscription.end()
+            except Exception:
+                _LOGGER.exception("Error ending mesh trace subscription")
+
+    @callback
+    def _flush(self) -> None:
+        self._cancel_flush = None
+        for subscription in list(self._subscriptions):
+            if not subscription.buffer:
+                continue
+            events = list(subscription.buffer)
+            dropped = subscription.dropped
+            subscription.buffer.clear()
+            subscription.dropped = 0
+            try:
+                subscription.deliver(events, dropped)
+            except Exception:
+                _LOGGER.exception("Error delivering mesh trace events")
@@ -13,15 +13,15 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_scene(scene: dt.PlejdScene, site: PlejdSite) -> None:
+    def async_add_scene(scene: dt.PlejdScene, site: PlejdSite) -> list:
         """Add light from Plejd."""
         if scene.hidden:
-            return
+            return []
         entity = PlejdSceneEntity(scene)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_scene, dt.PlejdDeviceType.SCENE
+        async_add_scene, dt.PlejdDeviceType.SCENE, async_add_entities
     )
 
 
@@ -29,17 +29,20 @@ class PlejdSceneEntity(PlejdDeviceBaseEntity, Scene):
     """Representation of a Plejd scene."""
 
     _attr_has_entity_name = True
-    device_info = None
 
     def __init__(self, scene: dt.PlejdScene) -> None:
         """Set up scene."""
         super().__init__(scene)
         self.device: dt.PlejdScene
 
-    @property
-    def name(self) -> str:
-        """Return the name of the scene entity."""
-        return self.device.name
+    def _device_info(self) -> None:
+        """Scenes don't belong to a device."""
+        return None
+
+    def _update_device_attributes(self) -> None:
+        """Read the name of the scene."""
+        super()._update_device_attributes()
+        self._attr_name = self.device.name
 
     async def async_activate(self, **_) -> None:
         """Activate the scene"""
@@ -1,5 +1,7 @@
 """Helper sensors for plejd devices."""
 
+from datetime import datetime
+
 from homeassistant.components.sensor import (
     SensorEntity,
     SensorDeviceClass,
@@ -7,10 +9,16 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
 
 from .plejd_site import dt, get_plejd_site_from_config_entry, PlejdSite
 from .plejd_entity import PlejdDeviceDiagnosticEntity
 
+# Weight of each new reading in the smoothed RSSI
+RSSI_SMOOTHING = 0.2
+# How far the smoothed RSSI must move before the reported value changes
+RSSI_HYSTERESIS = 3
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -21,13 +29,15 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_diagnostic_sensors(device: dt.PlejdDevice, site: PlejdSite):
+    def async_add_diagnostic_sensors(device: dt.PlejdDevice, site: PlejdSite) -> list:
         """Add diagnostic sensors from Plejd."""
-        last_seen = PlejdLastSeenSensor(device, hass)
-        rssi = PlejdRSSISensor(device, hass)
-        async_add_entities([last_seen, rssi])
+        last_seen = PlejdLastSeenSensor(device, site)
+        rssi = PlejdRSSISensor(device, site)
+        return [last_seen, rssi]
 
-    site.register_platform_add_device_callback(async_add_diagnostic_sensors, "HW")
+    site.register_platform_add_device_callback(
+        async_add_diagnostic_sensors, "HW", async_add_entities
+    )
 
 
 class PlejdLastSeenSensor(PlejdDeviceDiagnosticEntity, SensorEntity):
@@ -37,20 +47,27 @@ class PlejdLastSeenSensor(PlejdDeviceDiagnosticEntity, SensorEntity):
     _attr_name = "Last seen"
     _id_suffix = "last_seen"
 
-    def __init__(self, device: dt.PlejdDevice, hass) -> None:
+    def __init__(self, device: dt.PlejdDevice, site: PlejdSite) -> None:
         """Set up last seen sensor."""
         SensorEntity.__init__(self)
         PlejdDeviceDiagnosticEntity.__init__(self, device)
         self.device: dt.PlejdDevice
+        self.site = site
 
     @property
-    def state(self):
+    def native_value(self) -> datetime | None:
         return self._data.get("last_seen", None)
 
     @callback
     def _handle_update(self) -> None:
         """When device is seen."""
-        self._data["last_seen"] = self.device.hw.last_seen
+        if (last_seen := self.device.hw.last_seen) is None:
+            return
+        # Round down to the configured resolution, so that a device which is
+        # seen all the time doesn't update the state on every advertisement
+        resolution = self.site.last_seen_resolution.total_seconds()
+        timestamp = last_seen.timestamp() // resolution * resolution
+        self._data["last_seen"] = dt_util.utc_from_timestamp(timestamp)
 
 
 class PlejdRSSISensor(PlejdDeviceDiagnosticEntity, SensorEntity):
@@ -61,11 +78,13 @@ class PlejdRSSISensor(PlejdDeviceDiagnosticEntity, SensorEntity):
     _attr_name = "RSSI"
     _id_suffix = "rssi"
 
-    def __init__(self, device: dt.PlejdDevice, hass) -> None:
+    def __init__(self, device: dt.PlejdDevice, site: PlejdSite) -> None:
         """Set up rssi sensor."""
         SensorEntity.__init__(self)
         PlejdDeviceDiagnosticEntity.__init__(self, device)
         self.device: dt.PlejdDevice
+        self.site = site
+        self._smoothed: dict[str, float] = {}
 
     @property
     def state(self):
@@ -74,4 +93,24 @@ class PlejdRSSISensor(PlejdDeviceDiagnosticEntity, SensorEntity):
     @callback
     def _handle_update(self) -> None:
         """When device is seen."""
-        self._data["rssi"] = self.device.hw.rssi
+        ranking = self.site.gateway_ranking
+        address = self.device.hw.BLEaddress
+        reading = ranking.latest_reading(address)
+        if reading is None:
+            return
+        # Every scanner hears the device over a link of its own, so each link
+        # is averaged on its own and the best ranked one is reported
+        source, rssi = reading
+        smoothed = self._smoothed.get(source)
+        if smoothed is None:
+            self._smoothed[source] = rssi
+        else:
+            self._smoothed[source] = smoothed + RSSI_SMOOTHING * (rssi - smoothed)
+        best = ranking.best_source(address)
+        for stale in self._smoothed.keys() - ranking.history.get(address, {}).keys():
+            del self._smoothed[stale]
+        value = self._smoothed.get(best, self._smoothed[source])
+
+        reported = self._data.get("rssi")
+        if reported is None or abs(value - reported) >= RSSI_HYSTERESIS:
+            self._data["rssi"] = round(value)
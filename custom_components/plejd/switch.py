@@ -19,23 +19,25 @@ async def async_setup_entry(
     site = get_plejd_site_from_config_entry(hass, config_entry)
 
     @callback
-    def async_add_switch(device: dt.PlejdRelay, site: PlejdSite) -> None:
+    def async_add_switch(device: dt.PlejdRelay, site: PlejdSite) -> list:
         """Add light from Plejd."""
         entity = PlejdSwitch(device)
-        async_add_entities([entity])
+        return [entity]
 
     site.register_platform_add_device_callback(
-        async_add_switch, dt.PlejdDeviceType.SWITCH
+        async_add_switch, dt.PlejdDeviceType.SWITCH, async_add_entities
     )
 
     @callback
-    def async_add_diagnostic_switch(device: dt.PlejdDevice, site: PlejdSite) -> None:
+    def async_add_diagnostic_switch(device: dt.PlejdDevice, site: PlejdSite) -> list:
         """Add diagnostic switches from Plejd."""
-        entity = PlejdConnectableSwitch(device, site)
-        if device.hw._powered:
-            async_add_entities([entity])
+        if not device.hw._powered:
+            return []
+        return [PlejdConnectableSwitch(device, site)]
 
-    site.register_platform_add_device_callback(async_add_diagnostic_switch, "HW")
+    site.register_platform_add_device_callback(
+        async_add_diagnostic_switch, "HW", async_add_entities
+    )
 
 
 class PlejdSwitch(PlejdDeviceBaseEntity, SwitchEntity):
@@ -54,11 +56,11 @@ class PlejdSwitch(PlejdDeviceBaseEntity, SwitchEntity):
 
     async def async_turn_on(self, **_) -> None:
         """Turn the switch on."""
-        await self.device.turn_on()
+        await self._async_send("turn_on", expected={"state": True})
 
     async def async_turn_off(self, **_) -> None:
         """Turn the switch off."""
-        await self.device.turn_off()
+        await self._async_send("turn_off", expected={"state": False})
 
 
 class PlejdConnectableSwitch(PlejdDeviceDiagnosticEntity, SwitchEntity):
@@ -84,10 +86,10 @@ class PlejdConnectableSwitch(PlejdDeviceDiagnosticEntity, SwitchEntity):
         """Blacklist the device"""
         self.site.blacklist.discard(self.device.ble_mac)
         await self.site.update_blacklist()
-        self.async_write_ha_state()
+        self._async_write_state()
 
     async def async_turn_off(self, **_) -> None:
         """Un-blacklist the device"""
         self.site.blacklist.add(self.device.ble_mac)
         await self.site.update_blacklist()
-        self.async_write_ha_state()
+        self._async_write_state()
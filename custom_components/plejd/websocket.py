@@ -0,0 +1,68 @@
+"""Websocket API for Plejd."""
+
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+from .plejd_trace import TRACE_EVENT_TYPES
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the Plejd websocket commands."""
+    websocket_api.async_register_command(hass, ws_subscribe_trace)
+
+
+@websocket_api.require_admin
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "plejd/trace/subscribe",
+        vol.Required("entry_id"): str,
+        vol.Optional("devices"): [str],
+        vol.Optional("rooms"): [str],
+        vol.Optional("event_types"): [vol.In(TRACE_EVENT_TYPES)],
+    }
+)
+@callback
+def ws_subscribe_trace(
+    hass: HomeAssistant,
+    connection: websocket_api.ActiveConnection,
+    msg: dict[str, Any],
+) -> None:
+    """Stream the mesh events of a Plejd site."""
+    if not (site := hass.data.get(DOMAIN, {}).get(msg["entry_id"])):
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "Plejd site not found"
+        )
+        return
+
+    @callback
+    def _deliver(events: list[dict], dropped: int) -> None:
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"], {"events": events, "dropped": dropped}
+            )
+        )
+
+    @callback
+    def _end() -> None:
+        # The site was unloaded, so no more events will come
+        connection.subscriptions.pop(msg["id"], None)
+        connection.send_message(
+            websocket_api.event_message(
+                msg["id"], {"events": [], "dropped": 0, "end": True}
+            )
+        )
+
+    connection.subscriptions[msg["id"]] = site.trace.subscribe(
+        _deliver,
+        devices=msg.get("devices"),
+        rooms=msg.get("rooms"),
+        event_types=msg.get("event_types"),
+        end=_end,
+    )
+    connection.send_result(msg["id"])
@@ -8,34 +8,52 @@ import json
 import sys
 
 
-def main(filename):
-    site = PlejdCloudSite("", "", "")
+def load_details(filename):
+    """Load raw site details from a diagnostics data file."""
     with open(filename, "r") as fp:
         details = json.load(fp)
-        if "data" in details:
-            details = details["data"]
-        site._details_raw = details
-        site.details = sd.SiteDetails(**site._details_raw)
+    if "data" in details:
+        details = details["data"]
+    return details
+
+
+def parse_site(details):
+    """Validate raw site details the way the cloud client does."""
+    site = PlejdCloudSite("", "", "")
+    site._details_raw = details
+    site.details = sd.SiteDetails(**site._details_raw)
+    return site
+
+
+def entity_data(site):
+    """Return the output, input and scene data of a site."""
+    return list(site.outputs), list(site.inputs), list(site.scenes)
+
+
+def build_devices(outputs, inputs, scenes):
+    """Construct the device class of each output, input and scene."""
+    return (
+        [outputDeviceClass(output)(mesh=None, **output) for output in outputs],
+        [inputDeviceClass(input)(mesh=None, **input) for input in inputs],
+        [sceneDeviceClass(scene)(mesh=None, **scene) for scene in scenes],
+    )
+
+
+def main(filename):
+    site = parse_site(load_details(filename))
+    outputs, inputs, scenes = build_devices(*entity_data(site))
 
     print("Output Devices:")
-    for output in site.outputs:
-        cls = outputDeviceClass(output)
-        # pprint.pp(output)
-        print(cls(mesh=None, **output))
-        # print("")
+    for output in outputs:
+        print(output)
 
     print("Input Devices:")
-    for input in site.inputs:
-        cls = inputDeviceClass(input)
-        # pprint.pp(input)
-        print(cls(mesh=None, **input))
-        # print("")
+    for input in inputs:
+        print(input)
 
     print("Scenes:")
-    for scene in site.scenes:
-        cls = sceneDeviceClass(scene)
-        # pprint.pp(input)
-        print(cls(mesh=None, **scene))
+    for scene in scenes:
+        print(scene)
 
 
 def usage():